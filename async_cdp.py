@@ -0,0 +1,359 @@
+"""asyncio client for the Chrome DevTools Protocol, for the async suite mode.
+
+One ``Connection`` to the browser carries every page: each ``Page`` is a
+flattened CDP session on it, so any number of pages can be driven from one
+event loop and their waits overlap instead of blocking a thread each. The
+websocket is a minimal RFC 6455 client on asyncio streams, so nothing beyond
+the standard library is needed.
+
+Page scripts follow Selenium's ``execute_script``/``execute_async_script``
+conventions (``arguments``, the callback as last argument), so the JS snippets
+of the sync suites run unchanged.
+"""
+import asyncio
+import base64
+import itertools
+import json
+import os
+from collections import defaultdict
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+
+class CDPError(Exception):
+    pass
+
+
+class WebSocket:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, url: str) -> "WebSocket":
+        u = urlparse(url)
+        reader, writer = await asyncio.open_connection(u.hostname, u.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {u.path} HTTP/1.1\r\nHost: {u.hostname}:{u.port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            writer.close()
+            raise ConnectionError(f"Websocket handshake refused: {head.splitlines()[0].decode(errors='replace')}")
+        return cls(reader, writer)
+
+    async def _send_frame(self, opcode: int, payload: bytes):
+        n = len(payload)
+        if n < 126:
+            header = bytes([0x80 | opcode, 0x80 | n])
+        elif n < 1 << 16:
+            header = bytes([0x80 | opcode, 0x80 | 126]) + n.to_bytes(2, "big")
+        else:
+            header = bytes([0x80 | opcode, 0x80 | 127]) + n.to_bytes(8, "big")
+        # Clients must mask; XOR through one big int instead of byte by byte
+        mask = os.urandom(4)
+        keystream = (mask * (n // 4 + 1))[:n]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(keystream, "big")).to_bytes(n, "big") if n else b""
+        async with self.lock:
+            self.writer.write(header + mask + masked)
+            await self.writer.drain()
+
+    async def send(self, text: str):
+        await self._send_frame(0x1, text.encode())
+
+    async def recv(self) -> str:
+        message = bytearray()
+        while True:
+            b1, b2 = await self.reader.readexactly(2)
+            opcode, n = b1 & 0x0F, b2 & 0x7F
+            if n == 126:
+                n = int.from_bytes(await self.reader.readexactly(2), "big")
+            elif n == 127:
+                n = int.from_bytes(await self.reader.readexactly(8), "big")
+            mask = await self.reader.readexactly(4) if b2 & 0x80 else None
+            data = await self.reader.readexactly(n)
+            if mask:
+                data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+            if opcode == 0x8:
+                raise ConnectionError("Websocket closed by the browser")
+            if opcode == 0x9:
+                await self._send_frame(0xA, data)
+                continue
+            if opcode == 0xA:
+                continue
+            message += data
+            if b1 & 0x80:
+                return message.decode()
+
+    async def close(self):
+        try:
+            await self._send_frame(0x8, b"")
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+
+class Connection:
+    """Browser-level DevTools connection; commands and events per session."""
+
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.ids = itertools.count(1)
+        self.pending: dict[int, asyncio.Future] = {}
+        self.listeners = defaultdict(list)
+        # Set once the reader stops: later commands fail at once instead of waiting forever
+        self.closed: Exception | None = None
+        self.reader = asyncio.create_task(self._read())
+
+    @classmethod
+    async def open(cls, address: str) -> "Connection":
+        def ws_url():
+            with urlopen(f"http://{address}/json/version", timeout=5) as r:
+                return json.load(r)["webSocketDebuggerUrl"]
+
+        return cls(await WebSocket.connect(await asyncio.to_thread(ws_url)))
+
+    async def send(self, method: str, params: dict | None = None, session_id: str | None = None) -> dict:
+        if self.closed is not None:
+            raise ConnectionError(f"DevTools connection lost: {self.closed}")
+        msg_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[msg_id] = future
+        msg = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        await self.ws.send(json.dumps(msg))
+        return await future
+
+    def on(self, method: str, callback, session_id: str | None = None):
+        self.listeners[(session_id, method)].append(callback)
+
+    def off(self, method: str, callback, session_id: str | None = None):
+        callbacks = self.listeners.get((session_id, method), [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    async def _read(self):
+        error: Exception = ConnectionError("reader stopped")
+        try:
+            while True:
+                msg = json.loads(await self.ws.recv())
+                if "id" in msg:
+                    future = self.pending.pop(msg["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in msg:
+                        future.set_exception(CDPError(msg["error"].get("message", msg["error"])))
+                    else:
+                        future.set_result(msg.get("result", {}))
+                elif "method" in msg:
+                    for callback in list(self.listeners.get((msg.get("sessionId"), msg["method"]), [])):
+                        # One broken listener must not take every other page down with it
+                        try:
+                            callback(msg.get("params", {}))
+                        except Exception as e:
+                            print(f"DevTools listener for {msg['method']} failed: {e!r}")
+        except asyncio.CancelledError:
+            error = ConnectionError("connection closed")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self.closed = error
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"DevTools connection lost: {error!r}"))
+            self.pending.clear()
+
+    def wait_for(self, method: str, predicate=None, session_id: str | None = None) -> asyncio.Future:
+        """Future for the next ``method`` event (register it before triggering the action)."""
+        future = asyncio.get_running_loop().create_future()
+
+        def callback(params):
+            if future.done():
+                return
+            try:
+                matched = predicate is None or predicate(params)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if matched:
+                future.set_result(params)
+
+        self.on(method, callback, session_id)
+        # Also when the caller gives up on it (asyncio.wait_for cancels it on timeout)
+        future.add_done_callback(lambda _: self.off(method, callback, session_id))
+        return future
+
+    async def close(self):
+        self.reader.cancel()
+        await self.ws.close()
+
+
+# Same lookups as Selenium's By strategies, so locators.py entries work as they are
+JS_FIND = """
+function __find(by, value) {
+    if (by === 'id') return document.getElementById(value);
+    if (by === 'css selector') return document.querySelector(value);
+    if (by === 'class name') return document.getElementsByClassName(value)[0] || null;
+    if (by === 'xpath') return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    throw new Error('Unsupported locator strategy: ' + by);
+}
+function __visible(el) {
+    if (!el) return false;
+    const r = el.getBoundingClientRect(), s = getComputedStyle(el);
+    return r.width > 0 && r.height > 0 && s.visibility !== 'hidden' && s.display !== 'none';
+}
+"""
+
+JS_WAIT_FOR = JS_FIND + """
+const [by, value, visible, timeoutMs, done] = arguments;
+const ok = () => visible ? __visible(__find(by, value)) : !!__find(by, value);
+if (ok()) return done(true);
+const observer = new MutationObserver(() => { if (ok()) { observer.disconnect(); clearTimeout(timer); done(true); } });
+observer.observe(document.documentElement, {subtree: true, childList: true, attributes: true});
+const timer = setTimeout(() => { observer.disconnect(); done(ok()); }, timeoutMs);
+"""
+
+JS_CENTER = JS_FIND + """
+const el = __find(arguments[0], arguments[1]);
+if (!el) return null;
+el.scrollIntoView({block: 'center'});
+const r = el.getBoundingClientRect();
+return {x: r.left + r.width / 2, y: r.top + r.height / 2};
+"""
+
+
+class Page:
+    """One tab, driven through its own flattened session."""
+
+    def __init__(self, conn: Connection, target_id: str, session_id: str, context_id: str | None = None,
+                 download_dir: str | None = None):
+        self.conn = conn
+        self.target_id = target_id
+        self.session_id = session_id
+        self.context_id = context_id
+        # Set for pages of a context made with its own downloads folder
+        self.download_dir = download_dir
+
+    async def send(self, method: str, params: dict | None = None) -> dict:
+        return await self.conn.send(method, params, self.session_id)
+
+    def wait_for_event(self, method: str, predicate=None) -> asyncio.Future:
+        return self.conn.wait_for(method, predicate, self.session_id)
+
+    async def _evaluate(self, expression: str, await_promise: bool = False, by_value: bool = True) -> dict:
+        reply = await self.send("Runtime.evaluate", {
+            "expression": expression, "returnByValue": by_value, "awaitPromise": await_promise, "userGesture": True,
+        })
+        if "exceptionDetails" in reply:
+            details = reply["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text"))
+        return reply["result"]
+
+    async def run_script(self, js: str, *args):
+        """``driver.execute_script(js, *args)``: returns the JSON value of the script's ``return``."""
+        return (await self._evaluate(f"(function() {{\n{js}\n}}).apply(null, {json.dumps(list(args))})")).get("value")
+
+    async def run_async_script(self, js: str, *args):
+        """``driver.execute_async_script``: the script calls the extra last argument when done."""
+        expression = f"new Promise(done => (function() {{\n{js}\n}}).apply(null, {json.dumps(list(args))}.concat([done])))"
+        return (await self._evaluate(expression, await_promise=True)).get("value")
+
+    async def goto(self, url: str, ready_locator, timeout: float = 10.0):
+        """Navigate and return once ``ready_locator`` is present (DOMContentLoaded, like the eager profile)."""
+        loaded = self.wait_for_event("Page.domContentEventFired")
+        await self.send("Page.navigate", {"url": url})
+        await asyncio.wait_for(loaded, timeout)
+        await self.wait_for(ready_locator, timeout)
+
+    async def wait_for(self, locator, timeout: float = 5.0, visible: bool = False):
+        by, value = locator
+        if not await self.run_async_script(JS_WAIT_FOR, by, value, visible, int(timeout * 1000)):
+            raise TimeoutError(f"{value!r} not {'visible' if visible else 'present'} after {timeout:.1f}s")
+
+    async def click(self, locator, timeout: float = 5.0):
+        """A real (trusted) mouse click in the middle of the element, like ``WebElement.click``."""
+        await self.wait_for(locator, timeout, visible=True)
+        point = await self.run_script(JS_CENTER, *locator)
+        if point is None:
+            raise CDPError(f"{locator[1]!r} disappeared before the click")
+        base = {"x": point["x"], "y": point["y"], "button": "left", "clickCount": 1}
+        await self.send("Input.dispatchMouseEvent", dict(base, type="mouseMoved", button="none", clickCount=0))
+        await self.send("Input.dispatchMouseEvent", dict(base, type="mousePressed"))
+        await self.send("Input.dispatchMouseEvent", dict(base, type="mouseReleased"))
+
+    async def set_files(self, locator, paths: list[str]):
+        """Equivalent of ``send_keys(path)`` on a file input."""
+        by, value = locator
+        element = await self._evaluate(f"(function() {{ {JS_FIND} return __find({json.dumps(by)}, {json.dumps(value)}); }})()",
+                                       by_value=False)
+        if "objectId" not in element:
+            raise CDPError(f"{value!r} not found")
+        await self.send("DOM.setFileInputFiles", {"files": list(paths), "objectId": element["objectId"]})
+
+    async def screenshot(self, path: str) -> str:
+        data = (await self.send("Page.captureScreenshot", {"format": "png"}))["data"]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        await asyncio.to_thread(_write, path, base64.b64decode(data))
+        return path
+
+    async def close(self):
+        await self.conn.send("Target.closeTarget", {"targetId": self.target_id})
+
+
+def _write(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class Browser:
+    """One Chrome; ``new_page`` opens tabs (optionally in an isolated browser context)."""
+
+    def __init__(self, conn: Connection, process=None, blocked_urls: list[str] | None = None):
+        self.conn = conn
+        self.process = process
+        self.blocked_urls = blocked_urls
+        self.download_dirs: dict[str, str] = {}
+
+    @classmethod
+    async def connect(cls, address: str, process=None, blocked_urls: list[str] | None = None) -> "Browser":
+        return cls(await Connection.open(address), process, blocked_urls)
+
+    async def new_context(self, download_dir: str | None = None) -> str:
+        """An incognito-like context: its own cookies, storage, cache and downloads folder."""
+        context_id = (await self.conn.send("Target.createBrowserContext", {"disposeOnDetach": True}))["browserContextId"]
+        if download_dir:
+            await self.conn.send("Browser.setDownloadBehavior", {
+                "behavior": "allow", "downloadPath": download_dir, "eventsEnabled": True,
+                "browserContextId": context_id,
+            })
+            self.download_dirs[context_id] = download_dir
+        return context_id
+
+    async def dispose_context(self, context_id: str):
+        """Closes the context's pages and drops everything it stored."""
+        self.download_dirs.pop(context_id, None)
+        await self.conn.send("Target.disposeBrowserContext", {"browserContextId": context_id})
+
+    async def new_page(self, context_id: str | None = None, width: int = 1280, height: int = 900) -> Page:
+        params = {"url": "about:blank", "width": width, "height": height}
+        if context_id:
+            params["browserContextId"] = context_id
+        target_id = (await self.conn.send("Target.createTarget", params))["targetId"]
+        session_id = (await self.conn.send("Target.attachToTarget", {"targetId": target_id, "flatten": True}))["sessionId"]
+        page = Page(self.conn, target_id, session_id, context_id, self.download_dirs.get(context_id))
+        await page.send("Page.enable")
+        # Pages share one window: keep background tabs' timers and rendering at full speed
+        await page.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        if self.blocked_urls:
+            await page.send("Network.enable")
+            await page.send("Network.setBlockedURLs", {"urls": self.blocked_urls})
+        return page
+
+    async def close(self):
+        await self.conn.close()
+        if self.process is not None:
+            await asyncio.to_thread(self.process.stop)
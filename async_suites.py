@@ -0,0 +1,430 @@
+"""Async mode: the four suites as coroutines on one event loop, over DevTools.
+
+The page helpers (``open_page``, ``fill_form``, ``submit``, ``click_option``,
+``click_checkbox``, ``get_output_text``...) have awaitable versions here that
+drive Chrome through ``async_cdp`` instead of blocking on Selenium. Every test
+gets its own tab and ``--concurrency`` of them run at once in a single Chrome
+and a single Python thread, so their page loads and settle waits overlap.
+They reuse the sync suites' URLs, locators and JS snippets and check the same
+things.
+
+``--isolation context`` gives each test its own browser context (cookies,
+storage, cache and downloads folder of its own, like an incognito window)
+instead of a tab in the shared profile; ``--isolation process`` starts a Chrome
+per test, the usual isolation. The peak memory of the Chrome process trees is
+sampled during the run and reported as concurrent tests per GB, and
+``--compare`` runs the tests again a Chrome per test to set them side by side.
+
+    python async_suites.py --concurrency 8
+    python async_suites.py --isolation context --compare
+    python async_suites.py --suite textbox --browser 127.0.0.1:9222   # an already open Chrome
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import browser_daemon
+import chekbox
+import drivers
+import radiobox
+import results
+import textbox
+import upload
+import waits
+from async_cdp import JS_FIND, Browser
+from capture import artifacts_dir
+from locators import locator
+from resources import tree_rss
+
+# Tabs share one window: without these Chrome slows the timers of the hidden ones down
+ASYNC_CHROME_ARGS = [
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+]
+
+PAGES = {
+    "textbox": (textbox.URL, locator("textbox.user_name")),
+    "radiobox": (radiobox.URL, locator("radiobox.option")),
+    "chekbox": (chekbox.URL, locator("chekbox.home")),
+    "upload": (upload.URL, locator("upload.file_input")),
+}
+
+
+async def open_page(page, suite: str, timeout: float = 10.0):
+    url, ready = PAGES[suite]
+    start = time.perf_counter()
+    await page.goto(url, ready, timeout)
+    waits.record(f"open_page:{suite}[async]", time.perf_counter() - start)
+
+
+async def wait_for_quiet(page, label: str, baseline: float = 0.0, timeout: float = 5.0) -> bool:
+    start = time.perf_counter()
+    res = await page.run_async_script(waits.JS_WAIT_QUIET, waits.CONTENT_ROOT, waits.QUIET_MS, int(timeout * 1000)) or {}
+    settled = bool(res.get("settled"))
+    waits.record(label, time.perf_counter() - start, baseline, settled, res.get("mutations", 0))
+    return settled
+
+
+async def settled_text(page, loc, label: str) -> str:
+    """Text of ``loc`` once the page is quiet, "" when it is not there (see waits.settled_text)."""
+    if not await wait_for_quiet(page, label):
+        raise AssertionError(f"{label}: the page was still changing after 5s")
+    script = JS_FIND + "const el = __find(arguments[0], arguments[1]); return el ? el.innerText : '';"
+    return await page.run_script(script, *loc) or ""
+
+
+# --- text-box ---
+
+async def fill_form(page, email: str | None = None, name="Mohamed Test", current="Addr 1", permanent="Addr 2",
+                    submit_form: bool = False):
+    values = {"userName": name, "userEmail": email or "", "currentAddress": current, "permanentAddress": permanent}
+    # JS_FILL_FORM returns the email element, which cannot cross the protocol by value
+    await page.run_script(f"(function() {{\n{textbox.JS_FILL_FORM}\n}}).apply(null, arguments); return null;",
+                          values, submit_form)
+    if submit_form:
+        await wait_for_quiet(page, "submit")
+
+
+async def submit(page):
+    await page.click(locator("textbox.submit"))
+    await wait_for_quiet(page, "submit")
+
+
+async def get_output_text(page) -> str:
+    return await settled_text(page, locator("textbox.output"), "get_output_text")
+
+
+async def email_has_error(page) -> bool:
+    return await page.run_script("return document.getElementById('userEmail').classList.contains('field-error');")
+
+
+async def test_valid_email(page):
+    email = "mohamed.cherif02@esprit.tn"
+    await open_page(page, "textbox")
+    await fill_form(page, email=email)
+    await submit(page)
+    assert not await email_has_error(page), "Valid email should not have 'field-error'."
+    out = await get_output_text(page)
+    assert "Email:" in out and email in out, "Output should include the valid email."
+
+
+async def test_empty_email(page):
+    await open_page(page, "textbox")
+    await fill_form(page, email="", submit_form=True)
+    assert not await email_has_error(page), "Empty email should not be marked as error."
+    assert "Email:" not in await get_output_text(page), "Email line should be absent for empty email."
+
+
+async def test_invalid_email(page):
+    await open_page(page, "textbox")
+    await fill_form(page, email="mohamed.cherifesprit.tn", submit_form=True)
+    assert await email_has_error(page), "Invalid email should have 'field-error'."
+    assert "Email:" not in await get_output_text(page), "Email line should not be present for invalid email."
+
+
+async def test_invalid_email_missing_domain(page):
+    await open_page(page, "textbox")
+    await fill_form(page, email="mohamed.cherif02@", submit_form=True)
+    assert await email_has_error(page), "Invalid email (missing domain) should have 'field-error'."
+    assert "Email:" not in await get_output_text(page), \
+        "Email line should not be present for invalid email (missing domain)."
+
+
+# --- radio-button ---
+
+async def click_option(page, input_id: str):
+    await page.click(locator("radiobox.label", input_id=input_id))
+    await wait_for_quiet(page, "click_option")
+
+
+async def radio_state(page, input_id: str) -> dict:
+    return await page.run_script(
+        "const el = document.getElementById(arguments[0]); return {selected: el.checked, enabled: !el.disabled};",
+        input_id)
+
+
+async def test_yes_selection_exclusive(page):
+    await open_page(page, "radiobox")
+    await click_option(page, "yesRadio")
+    assert (await radio_state(page, "yesRadio"))["selected"], "Yes should be selected after clicking."
+    assert not (await radio_state(page, "impressiveRadio"))["selected"], \
+        "Impressive should NOT be selected when Yes is selected."
+    assert (await settled_text(page, locator("radiobox.result"), "get_result_text")).strip() == "Yes", \
+        "Result text should show 'Yes'."
+
+
+async def test_impressive_selection_exclusive(page):
+    await open_page(page, "radiobox")
+    await click_option(page, "impressiveRadio")
+    assert (await radio_state(page, "impressiveRadio"))["selected"], "Impressive should be selected after clicking."
+    assert not (await radio_state(page, "yesRadio"))["selected"], "Yes should NOT be selected when Impressive is selected."
+    assert (await settled_text(page, locator("radiobox.result"), "get_result_text")).strip() == "Impressive", \
+        "Result text should show 'Impressive'."
+
+
+async def test_no_is_disabled(page):
+    await open_page(page, "radiobox")
+    assert not (await radio_state(page, "noRadio"))["enabled"], "'No' option should be disabled."
+
+
+# --- checkbox ---
+
+async def expand_all_tree(page):
+    await page.click(locator("chekbox.expand_all"), timeout=10)
+    await wait_for_quiet(page, "expand_all_tree", baseline=1.0)
+
+
+async def click_checkbox(page, name: str):
+    await page.click(locator("chekbox.checkbox", name=name), timeout=10)
+    await wait_for_quiet(page, "click_checkbox", baseline=0.5)
+
+
+async def snapshot_tree(page) -> dict:
+    return chekbox.parse_snapshot(await page.run_script(chekbox.JS_TREE_SNAPSHOT, chekbox.ID_RESULT))
+
+
+async def open_tree(page):
+    await open_page(page, "chekbox", timeout=20)
+    await expand_all_tree(page)
+
+
+async def test_tc_cb_03_cascade_positive(page):
+    await open_tree(page)
+    await click_checkbox(page, "Home")
+    snapshot = await snapshot_tree(page)
+    result_items = [value.lower() for value in snapshot["result"]]
+    for item in ["desktop", "notes", "commands", "documents", "workspace", "react", "angular", "veu",
+                 "office", "public", "private", "classified", "general", "downloads", "wordFile", "excelFile"]:
+        assert item.lower() in result_items, f"L'élément '{item}' n'a pas été trouvé dans le résultat après la cascade."
+    unchecked = [name for name, node in snapshot["nodes"].items() if node["state"] != "check"]
+    assert not unchecked, f"Nœuds non cochés après la cascade : {unchecked}"
+
+
+async def test_tc_cb_05_etat_partiel(page):
+    await open_tree(page)
+    await click_checkbox(page, "Documents")
+    await click_checkbox(page, "WorkSpace")
+    assert chekbox.node_state(await snapshot_tree(page), "Documents") == "half-check", \
+        "Le parent 'Documents' n'est pas passé à l'état Partiel."
+
+
+async def test_tc_cb_06_affichage_resultat(page):
+    await open_tree(page)
+    await click_checkbox(page, "Desktop")
+    await click_checkbox(page, "General")
+    actual = (await settled_text(page, locator("chekbox.result"), "get_result_text")).replace(
+        "You have selected :", "").strip()
+    expected = "desktop, general"
+    assert actual == expected, f"Résultat incorrect. Attendu : '{expected}', Obtenu : '{actual}'"
+
+
+# --- upload-download ---
+
+async def test_upload_shows_filename(page):
+    await open_page(page, "upload")
+    path = upload.create_temp_file()
+    await page.set_files(locator("upload.file_input"), [path])
+    await page.wait_for(locator("upload.uploaded_path"), visible=True)
+    state = await page.run_script(
+        "return {text: document.getElementById('uploadedFilePath').innerText,"
+        " value: document.getElementById('uploadFile').value};")
+    filename = os.path.basename(path)
+    assert filename in state["text"], "Uploaded file name should appear in the result text."
+    assert filename in state["value"], "Input value should include the uploaded file name."
+    assert "fakepath" in (state["value"] + state["text"]).lower(), "Browser should expose a fake path for security."
+
+
+async def test_download_saves_file(page):
+    await open_page(page, "upload")
+    folder = page.download_dir
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix="download-", dir=upload.downloads_dir())
+        await page.conn.send("Browser.setDownloadBehavior",
+                             {"behavior": "allow", "downloadPath": folder, "eventsEnabled": True})
+    # Download events are browser-wide: keep the one started from this tab
+    began = page.conn.wait_for("Browser.downloadWillBegin", lambda p: p.get("frameId") == page.target_id)
+    await page.click(locator("upload.download_button"))
+    guid = (await asyncio.wait_for(began, 25))["guid"]
+    done = await asyncio.wait_for(page.conn.wait_for(
+        "Browser.downloadProgress", lambda p: p["guid"] == guid and p["state"] in ("completed", "canceled")), 25)
+    assert done["state"] == "completed", "The download should complete."
+    files = os.listdir(folder)
+    assert files and os.path.getsize(os.path.join(folder, files[0])) > 0, "The downloaded file should not be empty."
+
+
+TESTS = [
+    ("textbox", test_valid_email), ("textbox", test_empty_email), ("textbox", test_invalid_email),
+    ("textbox", test_invalid_email_missing_domain),
+    ("radiobox", test_yes_selection_exclusive), ("radiobox", test_impressive_selection_exclusive),
+    ("radiobox", test_no_is_disabled),
+    ("chekbox", test_tc_cb_03_cascade_positive), ("chekbox", test_tc_cb_05_etat_partiel),
+    ("chekbox", test_tc_cb_06_affichage_resultat),
+    ("upload", test_upload_shows_filename), ("upload", test_download_saves_file),
+]
+
+
+async def run_test(browser, suite: str, fn, writer: results.ResultWriter, isolate: bool = False) -> dict:
+    """Run ``fn`` in a new tab (in its own browser context when ``isolate``) and record the result.
+
+    A lost tab or connection is this test's ERROR, never an exception that
+    would abort the other tests in flight.
+    """
+    writer.start(suite, fn.__name__)
+    start = time.perf_counter()
+    status, msg, artifacts = "PASS", "", []
+    page = context_id = None
+    try:
+        if isolate:
+            context_id = await browser.new_context(tempfile.mkdtemp(prefix="download-", dir=upload.downloads_dir()))
+        page = await browser.new_page(context_id)
+        await fn(page)
+    except AssertionError as e:
+        status, msg = "FAIL", str(e)
+    except Exception as e:
+        status, msg = "ERROR", f"Unexpected: {e!r}"
+    finally:
+        elapsed = time.perf_counter() - start
+        if page is not None and status != "PASS":
+            try:
+                artifacts.append(await page.screenshot(os.path.join(artifacts_dir("async"), f"{suite}.{fn.__name__}.png")))
+            except Exception:
+                pass
+        try:
+            # Disposing of the context closes its pages too
+            if context_id is not None:
+                await browser.dispose_context(context_id)
+            elif page is not None:
+                await page.close()
+        except Exception as e:
+            if status == "PASS":
+                status, msg = "ERROR", f"Unexpected: closing the tab failed: {e!r}"
+    record = results.make_record(suite, fn.__name__, status, elapsed, msg, artifacts)
+    print(results.describe(record))
+    writer.write(record)
+    return record
+
+
+class MemoryPeak:
+    """Peak resident memory of the Chrome process trees in use, and of the tests in flight."""
+
+    def __init__(self):
+        self.pids: set[int] = set()
+        self.in_flight = 0
+        self.peak_rss = 0
+        self.peak_in_flight = 0
+
+    def sample(self):
+        self.peak_rss = max(self.peak_rss, sum(tree_rss(pid) for pid in self.pids))
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def watch(self, interval: float = 0.25):
+        while True:
+            self.sample()
+            await asyncio.sleep(interval)
+
+    def tests_per_gb(self) -> float:
+        return self.peak_in_flight / (self.peak_rss / 2**30) if self.peak_rss else 0.0
+
+    def report(self, label: str):
+        if not self.peak_rss:
+            print(f"{label}: memory unknown (no local Chrome process to measure)")
+            return
+        print(f"{label}: up to {self.peak_in_flight} tests at once, peak {self.peak_rss / 2**20:.0f} MB"
+              f" -> {self.tests_per_gb():.1f} tests/GB")
+
+
+async def run_in_process(suite: str, fn, writer: results.ResultWriter, headless: bool, blocked, probe: MemoryPeak) -> dict:
+    """The process-per-test baseline: a fresh Chrome for this one test."""
+    process = await asyncio.to_thread(browser_daemon.Browser, headless, ASYNC_CHROME_ARGS)
+    probe.pids.add(process.process.pid)
+    browser = await Browser.connect(process.address, process, blocked)
+    try:
+        return await run_test(browser, suite, fn, writer)
+    finally:
+        probe.pids.discard(process.process.pid)
+        await browser.close()
+
+
+async def run_all(tests, concurrency: int, headless: bool = True, address: str | None = None,
+                  isolation: str = "tab", probe: MemoryPeak | None = None,
+                  results_path: str | None = None) -> list[dict]:
+    """``isolation``: "tab" (shared profile), "context" (a browser context per test) or "process"."""
+    probe = probe or MemoryPeak()
+    blocked = drivers.BLOCKED_URLS if drivers.current_profile() == "fast" else None
+    browser = None
+    if isolation != "process":
+        process = None
+        if address is None:
+            process = await asyncio.to_thread(browser_daemon.Browser, headless, ASYNC_CHROME_ARGS)
+            address = process.address
+            probe.pids.add(process.process.pid)
+        browser = await Browser.connect(address, process, blocked)
+    writer = results.ResultWriter(results_path)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def isolated(suite, fn):
+        if isolation == "process":
+            return await run_in_process(suite, fn, writer, headless, blocked, probe)
+        return await run_test(browser, suite, fn, writer, isolate=isolation == "context")
+
+    async def guarded(suite, fn):
+        async with gate:
+            probe.in_flight += 1
+            try:
+                return await isolated(suite, fn)
+            finally:
+                probe.in_flight -= 1
+
+    watcher = asyncio.create_task(probe.watch())
+    try:
+        return await asyncio.gather(*(guarded(suite, fn) for suite, fn in tests))
+    finally:
+        watcher.cancel()
+        writer.close()
+        if browser is not None:
+            await browser.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the suites as coroutines over DevTools.")
+    parser.add_argument("--concurrency", type=int, default=8, help="tests in flight at once")
+    parser.add_argument("--suite", action="append", choices=sorted(PAGES), help="limit to one suite (repeatable)")
+    parser.add_argument("-k", dest="keyword", help="only run tests whose suite.name contains this")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--browser", metavar="HOST:PORT", help="use an already running Chrome's DevTools port")
+    parser.add_argument("--isolation", choices=("tab", "context", "process"), default="tab",
+                        help="tabs sharing one profile, a browser context per test, or a Chrome per test")
+    parser.add_argument("--compare", action="store_true",
+                        help="run the same tests again with a Chrome per test and compare tests per GB")
+    args = parser.parse_args(argv)
+    if args.browser and args.isolation == "process":
+        parser.error("--isolation process starts its own Chromes; drop --browser")
+    tests = [(s, fn) for s, fn in TESTS
+             if (not args.suite or s in args.suite) and (not args.keyword or args.keyword in f"{s}.{fn.__name__}")]
+    if not tests:
+        # A typo in -k must not look like a green run
+        print("No test matches the selection")
+        sys.exit(1)
+    start = time.perf_counter()
+    probe = MemoryPeak()
+    records = asyncio.run(run_all(tests, args.concurrency, not args.headed, args.browser, args.isolation, probe))
+    print(f"\n{len(records)} tests in {time.perf_counter() - start:.1f}s with up to {args.concurrency} at once")
+    probe.report(f"Isolation {args.isolation}")
+    if args.compare and args.isolation != "process":
+        # Separate results file: the comparison run must not override this run's report
+        baseline = MemoryPeak()
+        asyncio.run(run_all(tests, args.concurrency, not args.headed, isolation="process", probe=baseline,
+                            results_path=os.path.join(artifacts_dir("process-per-test"), results.FILE_NAME)))
+        baseline.report("Isolation process")
+        if probe.peak_rss and baseline.peak_rss:
+            print(f"{args.isolation.capitalize()}s fit {probe.tests_per_gb() / baseline.tests_per_gb():.1f}x "
+                  "as many concurrent tests per GB as a Chrome per test")
+    waits.print_report()
+    sys.exit(results.summarize(records))
+
+if __name__ == "__main__":
+    main()
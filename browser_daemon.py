@@ -0,0 +1,347 @@
+"""Long-lived pool of warmed Chrome instances the suites attach to.
+
+Every ``python textbox.py`` otherwise pays for chromedriver resolution and a
+Chrome cold start before its first test line. The daemon keeps ``--pool``
+browsers open on remote-debugging ports and resolves chromedriver once;
+``drivers.make_driver`` asks it for a free browser and attaches through
+``debuggerAddress``, or launches Chrome normally when no daemon answers.
+
+    python browser_daemon.py --pool 4            # leave running in a terminal
+    python textbox.py                            # attaches in milliseconds
+    python runner.py                             # so do the headless workers
+    python browser_daemon.py --status
+
+``--pool`` browsers are kept per mode: the suites' ``main()`` run headed and
+the runner headless, so both are served unless ``--mode`` picks one. A client
+asking for a mode the daemon does not serve says so and launches Chrome.
+
+A lease lives as long as the client's control connection: ``release`` hands
+the browser back (the client has already cleaned it), a dropped connection
+means the client died mid-test and that browser is restarted instead.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.request import urlopen
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("DEMOQA_DAEMON_PORT", "9555"))
+# Attaching must never slow a run down when the daemon is not there
+CONNECT_TIMEOUT = 0.05
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+CHROME_ARGS = [
+    "--remote-debugging-port=0",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-extensions",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--window-size=1280,900",
+]
+
+
+def chrome_binary() -> str:
+    path = os.environ.get("DEMOQA_CHROME_BINARY") or next(filter(None, map(shutil.which, CHROME_CANDIDATES)), None)
+    if not path:
+        raise RuntimeError("Chrome not found; set DEMOQA_CHROME_BINARY")
+    return path
+
+
+class Browser:
+    """One Chrome process with its own throwaway profile."""
+
+    def __init__(self, headless: bool, extra_args: list[str] = ()):
+        self.headless = headless
+        self.profile_dir = tempfile.mkdtemp(prefix="demoqa-chrome-")
+        args = [chrome_binary(), f"--user-data-dir={self.profile_dir}", *CHROME_ARGS, *extra_args]
+        if headless:
+            args.append("--headless=new")
+        self.process = subprocess.Popen(args + ["about:blank"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.port = self._wait_for_port()
+
+    def _wait_for_port(self, timeout: float = 20.0) -> int:
+        # With --remote-debugging-port=0 Chrome picks a free port and writes it here
+        marker = os.path.join(self.profile_dir, "DevToolsActivePort")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chrome exited during startup (code {self.process.returncode})")
+            try:
+                with open(marker) as f:
+                    port = int(f.readline())
+                urlopen(f"http://{HOST}:{port}/json/version", timeout=1).close()
+                return port
+            except (OSError, ValueError):
+                time.sleep(0.05)
+        raise RuntimeError("Chrome did not open its DevTools port")
+
+    @property
+    def address(self) -> str:
+        return f"{HOST}:{self.port}"
+
+    def alive(self) -> bool:
+        if self.process.poll() is not None:
+            return False
+        try:
+            urlopen(f"http://{self.address}/json/version", timeout=1).close()
+            return True
+        except OSError:
+            return False
+
+    def close_extra_tabs(self):
+        """Keep a single page target, whatever the last test left open."""
+        with urlopen(f"http://{self.address}/json/list", timeout=2) as r:
+            pages = [t for t in json.load(r) if t.get("type") == "page"]
+        for target in pages[1:]:
+            urlopen(f"http://{self.address}/json/close/{target['id']}", timeout=2).close()
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+def mode_name(headless: bool) -> str:
+    return "headless" if headless else "headed"
+
+
+class Pool:
+    """``size`` warmed browsers for each mode in ``modes`` (True: headless)."""
+
+    def __init__(self, size: int, modes: tuple[bool, ...] = (True, False)):
+        self.lock = threading.Lock()
+        self.free = {headless: [Browser(headless) for _ in range(size)] for headless in modes}
+        self.busy: set[Browser] = set()
+        first = next((b for browsers in self.free.values() for b in browsers), None)
+        self.chromedriver = resolve_chromedriver(first) if first else None
+
+    @property
+    def modes(self) -> list[str]:
+        return [mode_name(headless) for headless in self.free]
+
+    def acquire(self, headless: bool) -> Browser | None:
+        """A live browser of that mode, or None when all are lent out.
+
+        A dead one is replaced outside the lock so other leases are not held up
+        by the launch; raises RuntimeError (the pool shrinks) if that fails.
+        """
+        if headless not in self.free:
+            return None
+        with self.lock:
+            if not self.free[headless]:
+                return None
+            # Reserved before the health check so no other lease can take it
+            browser = self.free[headless].pop()
+            self.busy.add(browser)
+        if browser.alive():
+            return browser
+        with self.lock:
+            self.busy.discard(browser)
+        browser.stop()
+        browser = Browser(headless)
+        with self.lock:
+            self.busy.add(browser)
+        return browser
+
+    def release(self, browser: Browser, clean: bool):
+        with self.lock:
+            self.busy.discard(browser)
+        if clean:
+            try:
+                browser.close_extra_tabs()
+            except OSError:
+                clean = False
+        if not clean or not browser.alive():
+            # Unknown state (client died mid-test): start over rather than hand it out
+            browser.stop()
+            try:
+                browser = Browser(browser.headless)
+            except RuntimeError as e:
+                print(f"Could not restart a browser, pool shrinks: {e}")
+                return
+        with self.lock:
+            self.free[browser.headless].append(browser)
+
+    def status(self) -> dict:
+        with self.lock:
+            return {"free": {mode_name(h): len(b) for h, b in self.free.items()}, "busy": len(self.busy),
+                    "chromedriver": self.chromedriver}
+
+    def stop(self):
+        with self.lock:
+            for browser in [b for browsers in self.free.values() for b in browsers] + list(self.busy):
+                browser.stop()
+            self.free, self.busy = {headless: [] for headless in self.free}, set()
+
+
+def resolve_chromedriver(browser: Browser) -> str | None:
+    """Let Selenium Manager find chromedriver once so clients can skip it."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.debugger_address = browser.address
+    drv = webdriver.Chrome(options=options)
+    try:
+        return drv.service.path
+    finally:
+        # Attached sessions leave the browser running on quit
+        drv.quit()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        pool: Pool = self.server.pool
+        browser = None
+        clean = False
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "acquire" and browser is None:
+                    try:
+                        browser = pool.acquire(bool(request.get("headless", True)))
+                    except (OSError, RuntimeError) as e:
+                        # The client launches its own Chrome; it still needs an answer to do so at once
+                        reply = {"address": None, "error": f"could not restart a browser: {e}", "modes": pool.modes}
+                    else:
+                        reply = {"address": browser.address if browser else None, "chromedriver": pool.chromedriver,
+                                 "pid": browser.process.pid if browser else None, "modes": pool.modes}
+                elif op == "release":
+                    clean = True
+                    break
+                elif op == "status":
+                    reply = pool.status()
+                elif op == "stop":
+                    reply = {"stopping": True}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    reply = {"error": f"unknown op {op!r}"}
+                self.wfile.write((json.dumps(reply) + "\n").encode())
+        except (OSError, ValueError):
+            pass
+        finally:
+            if browser is not None:
+                pool.release(browser, clean)
+
+
+class Lease:
+    """Client side of an attached browser; the control connection is the lease."""
+
+    def __init__(self, sock: socket.socket, address: str, chromedriver: str | None, pid: int | None = None):
+        self.sock = sock
+        self.address = address
+        self.chromedriver = chromedriver
+        # Chrome's pid, for the resource monitor: it is the daemon's child, not chromedriver's
+        self.pid = pid
+
+    def release(self, clean: bool = True):
+        """Hand the browser back; ``clean=False`` makes the daemon restart it."""
+        try:
+            if clean:
+                self.sock.sendall(b'{"op": "release"}\n')
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+
+
+def _request(sock: socket.socket, payload: dict) -> dict:
+    sock.sendall((json.dumps(payload) + "\n").encode())
+    reply = b""
+    while not reply.endswith(b"\n"):
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise OSError("daemon closed the connection")
+        reply += chunk
+    return json.loads(reply)
+
+
+def _connect(port: int = PORT) -> socket.socket | None:
+    try:
+        sock = socket.create_connection((HOST, port), timeout=CONNECT_TIMEOUT)
+    except OSError:
+        return None
+    sock.settimeout(30)
+    return sock
+
+
+def acquire(headless: bool, port: int = PORT) -> Lease | None:
+    """A warmed browser from the daemon, or None (no daemon, pool busy, other mode)."""
+    if os.environ.get("DEMOQA_DAEMON") == "0":
+        return None
+    sock = _connect(port)
+    if sock is None:
+        return None
+    try:
+        reply = _request(sock, {"op": "acquire", "headless": headless})
+    except (OSError, ValueError):
+        sock.close()
+        return None
+    if not reply.get("address"):
+        sock.close()
+        # A busy pool is expected; a mode mismatch or a failed restart is worth a line
+        if reply.get("error"):
+            print(f"browser_daemon: {reply['error']}; launching Chrome")
+        elif reply.get("modes") and mode_name(headless) not in reply["modes"]:
+            print(f"browser_daemon: the daemon serves {', '.join(reply['modes'])} browsers, "
+                  f"not {mode_name(headless)}; launching Chrome")
+        return None
+    return Lease(sock, reply["address"], reply.get("chromedriver"), reply.get("pid"))
+
+
+def send(op: str, port: int = PORT) -> dict | None:
+    sock = _connect(port)
+    if sock is None:
+        return None
+    try:
+        return _request(sock, {"op": op})
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep warmed Chrome instances for the suites to attach to.")
+    parser.add_argument("--pool", type=int, default=2, help="number of browsers to keep open per mode")
+    parser.add_argument("--mode", choices=("both", "headless", "headed"), default="both",
+                        help="which browsers to keep: suites' main() ask for headed, the runner for headless")
+    parser.add_argument("--port", type=int, default=PORT, help="control port (default: $DEMOQA_DAEMON_PORT or 9555)")
+    parser.add_argument("--status", action="store_true", help="print the running daemon's pool and exit")
+    parser.add_argument("--stop", action="store_true", help="stop the running daemon")
+    args = parser.parse_args(argv)
+
+    if args.status or args.stop:
+        reply = send("stop" if args.stop else "status", args.port)
+        print(json.dumps(reply) if reply else f"No daemon on {HOST}:{args.port}")
+        sys.exit(0 if reply else 1)
+
+    modes = {"both": (True, False), "headless": (True,), "headed": (False,)}[args.mode]
+    pool = Pool(args.pool, modes)
+    server = socketserver.ThreadingTCPServer((HOST, args.port), Handler)
+    server.daemon_threads = True
+    server.pool = pool
+    print(f"{args.pool} warmed {' and '.join(pool.modes)} browsers each on {HOST}:{args.port} "
+          f"(chromedriver: {pool.chromedriver}; Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cheap step snapshots, and screenshots only when a test fails.
+
+``note`` keeps the last few DOM/state snapshots of the page in an in-memory ring
+buffer (one small ``execute_script``, no PNG). ``on_failure`` grabs the
+screenshot bytes from Chrome, then decodes the PNG and writes it, together with
+the recent snapshots, on a background thread. Files go to the per-run artifacts
+directory: ``DEMOQA_ARTIFACTS_DIR`` when the runner sets it, ``runs/<timestamp>``
+otherwise.
+"""
+import atexit
+import base64
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+RING_SIZE = 20
+# Enough of the content column to see what the page showed, without copying whole pages around
+MAX_HTML = 20_000
+
+_RUN_DIR = os.path.join("runs", datetime.now().strftime('%Y%m%d_%H%M%S'))
+_recent = deque(maxlen=RING_SIZE)
+_writes = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+JS_STATE = """
+const root = document.querySelector('.col-12.mt-4.col-md-6') || document.body;
+return {url: location.href, title: document.title, html: root ? root.outerHTML.slice(0, arguments[0]) : ''};
+"""
+
+
+def artifacts_dir(subdir: str | None = None) -> str:
+    path = os.environ.get("DEMOQA_ARTIFACTS_DIR") or _RUN_DIR
+    if subdir:
+        path = os.path.join(path, subdir)
+    return path
+
+
+def note(driver, label: str):
+    """Record the page state for a labelled step (kept in memory only)."""
+    try:
+        state = driver.execute_script(JS_STATE, MAX_HTML)
+    except Exception as e:
+        state = {"error": str(e)}
+    _recent.append({"label": label, "time": datetime.now().isoformat(timespec="milliseconds"), **state})
+
+
+def clear_steps():
+    """Forget the recorded steps (called when a new test starts)."""
+    _recent.clear()
+
+
+def recent() -> list[dict]:
+    return list(_recent)
+
+
+def _write_loop():
+    while True:
+        path, payload = _writes.get()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if path.endswith(".png"):
+                data = base64.b64decode(payload)
+                with open(path, "wb") as f:
+                    f.write(data)
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Could not write {path}: {e}")
+        finally:
+            _writes.task_done()
+
+
+def _submit(path: str, payload):
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="capture-writer", daemon=True)
+            _writer.start()
+    _writes.put((path, payload))
+
+
+def screenshot(driver, label: str, subdir: str | None = None) -> str:
+    """Take a screenshot now and write it in the background; returns the future file path."""
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(artifacts_dir(subdir), f"{label}_{ts}.png")
+    try:
+        # Only the capture itself must happen now; decoding and disk I/O are off the test's path
+        _submit(path, driver.get_screenshot_as_base64())
+    except Exception as e:
+        print(f"Could not save screenshot: {e}")
+    return path
+
+
+def on_failure(driver, name: str, subdir: str | None = None) -> str:
+    """Save the failure screenshot plus the recent step snapshots; returns the PNG path."""
+    path = screenshot(driver, name, subdir)
+    steps = recent()
+    if steps:
+        _submit(path[:-len(".png")] + ".steps.json", steps)
+    print(f"Failure artifacts: {path}")
+    return path
+
+
+def flush(timeout: float = 30.0):
+    """Wait until every pending artifact is on disk."""
+    end = time.monotonic() + timeout
+    while _writes.unfinished_tasks and time.monotonic() < end:
+        time.sleep(0.05)
+
+
+atexit.register(flush)
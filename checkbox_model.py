@@ -0,0 +1,201 @@
+"""Model-based exploration of the checkbox tree.
+
+``TreeModel`` is a pure-Python copy of the Home tree that predicts the ``#result``
+list and every node's check/uncheck/half-check state for any click sequence.
+``explore`` replays thousands of generated sequences on ONE live page: each
+sequence (in-page reset, clicks and the tree snapshot) is a single
+``execute_script``, with no reload in between. A mismatch is shrunk to a
+minimal reproducing sequence before it is reported.
+
+    python checkbox_model.py --sequences 2000 --max-length 8 --seed 1
+"""
+import argparse
+import random
+import sys
+import time
+
+import chekbox
+
+# (label, value, children) -- same nodes and order as the page
+TREE = ("Home", "home", [
+    ("Desktop", "desktop", [("Notes", "notes", []), ("Commands", "commands", [])]),
+    ("Documents", "documents", [
+        ("WorkSpace", "workspace", [("React", "react", []), ("Angular", "angular", []), ("Veu", "veu", [])]),
+        ("Office", "office", [("Public", "public", []), ("Private", "private", []),
+                              ("Classified", "classified", []), ("General", "general", [])]),
+    ]),
+    ("Downloads", "downloads", [("Word File.doc", "wordFile", []), ("Excel File.doc", "excelFile", [])]),
+])
+
+
+def walk(node=TREE, parent=None):
+    """Yield (label, value, children, parent_label) in document order."""
+    label, value, children = node
+    yield label, value, children, parent
+    for child in children:
+        yield from walk(child, label)
+
+
+LABELS = [label for label, _, _, _ in walk()]
+
+
+class TreeModel:
+    """Checked leaves drive everything, as in react-checkbox-tree."""
+
+    def __init__(self):
+        self.nodes = {label: (value, children, parent) for label, value, children, parent in walk()}
+        self.checked = set()
+
+    def leaves(self, label) -> list[str]:
+        _, children, _ = self.nodes[label]
+        if not children:
+            return [label]
+        return [leaf for child in children for leaf in self.leaves(child[0])]
+
+    def state(self, label) -> str:
+        leaves = self.leaves(label)
+        n = sum(1 for leaf in leaves if leaf in self.checked)
+        return "uncheck" if n == 0 else "check" if n == len(leaves) else "half-check"
+
+    def click(self, label):
+        # A checked node unchecks its subtree; unchecked or half-checked checks it all
+        leaves = self.leaves(label)
+        if self.state(label) == "check":
+            self.checked.difference_update(leaves)
+        else:
+            self.checked.update(leaves)
+
+    def result(self) -> list[str]:
+        return [self.nodes[label][0] for label in LABELS if self.state(label) == "check"]
+
+    def snapshot(self) -> dict:
+        """Same shape as chekbox.snapshot_tree() on a fully expanded tree."""
+        nodes = {
+            label: {"state": self.state(label), "expanded": True if children else None, "parent": parent}
+            for label, (_, children, parent) in self.nodes.items()
+        }
+        return {"nodes": nodes, "result": self.result()}
+
+
+def predict(sequence) -> dict:
+    model = TreeModel()
+    for label in sequence:
+        model.click(label)
+    return model.snapshot()
+
+
+def diff(expected: dict, actual: dict) -> list[str]:
+    problems = []
+    if expected["result"] != actual["result"]:
+        problems.append(f"#result: expected {expected['result']}, got {actual['result']}")
+    for label, node in expected["nodes"].items():
+        got = actual["nodes"].get(label)
+        if got is None:
+            problems.append(f"{label}: not rendered")
+        elif got["state"] != node["state"]:
+            problems.append(f"{label}: expected {node['state']}, got {got['state']}")
+    return problems
+
+
+# Reset in-page (Home until unchecked), play the clicks, then return the tree snapshot:
+# one round trip per sequence. React applies each click synchronously.
+JS_RUN_SEQUENCE = """
+const [sequence, resultId] = arguments;
+const box = name => {
+    const label = [...document.querySelectorAll('li.rct-node > .rct-text > label')]
+        .find(l => l.textContent.trim() === name);
+    return label ? label.querySelector('.rct-checkbox') : null;
+};
+for (let i = 0; i < 2; i++) {
+    const home = box('Home');
+    if (!home) return {error: 'Home not rendered'};
+    if (!/rct-icon-uncheck\\b/.test(home.querySelector('svg').getAttribute('class'))) home.click();
+}
+for (const name of sequence) {
+    const target = box(name);
+    if (!target) return {error: 'node not rendered: ' + name};
+    target.click();
+}
+return (function () {
+""" + chekbox.JS_TREE_SNAPSHOT + """
+}).apply(null, [resultId]);
+"""
+
+
+def run_sequence(driver, sequence) -> dict:
+    raw = driver.execute_script(JS_RUN_SEQUENCE, list(sequence), chekbox.ID_RESULT)
+    if raw.get("error"):
+        raise RuntimeError(raw["error"])
+    return chekbox.parse_snapshot(raw)
+
+
+def mismatches(driver, sequence) -> list[str]:
+    return diff(predict(sequence), run_sequence(driver, sequence))
+
+
+def shrink(driver, sequence) -> list[str]:
+    """Drop clicks one at a time while the page still disagrees with the model."""
+    sequence = list(sequence)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(sequence)):
+            candidate = sequence[:i] + sequence[i + 1:]
+            if candidate and mismatches(driver, candidate):
+                sequence = candidate
+                changed = True
+                break
+    return sequence
+
+
+def generate(count: int, max_length: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield [rng.choice(LABELS) for _ in range(rng.randint(1, max_length))]
+
+
+def explore(driver, count: int = 1000, max_length: int = 8, seed: int = 0, stop_after: int = 5) -> list[dict]:
+    """Run ``count`` generated sequences; returns one entry per (shrunk) mismatch."""
+    failures = []
+    n = clicks = 0
+    start = time.perf_counter()
+    for n, sequence in enumerate(generate(count, max_length, seed), 1):
+        clicks += len(sequence)
+        problems = mismatches(driver, sequence)
+        if not problems:
+            continue
+        minimal = shrink(driver, sequence)
+        failures.append({"sequence": sequence, "minimal": minimal, "problems": mismatches(driver, minimal)})
+        print(f"MISMATCH after {n} sequences, minimal reproduction: {minimal}")
+        for problem in failures[-1]["problems"]:
+            print(f"   - {problem}")
+        if len(failures) >= stop_after:
+            break
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Explored {n} sequences ({clicks} clicks) in {elapsed:.1f}s: "
+          f"{n / elapsed:.1f} sequences/s, {clicks / elapsed:.1f} clicks/s")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the checkbox tree with its model on random click sequences.")
+    parser.add_argument("--sequences", type=int, default=1000)
+    parser.add_argument("--max-length", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stop-after", type=int, default=5, help="stop after this many distinct mismatches")
+    args = parser.parse_args(argv)
+
+    driver = chekbox.start_session()
+    try:
+        failures = explore(driver, args.sequences, args.max_length, args.seed, args.stop_after)
+    finally:
+        driver.quit()
+    if failures:
+        print("\nSummary: Some sequences disagree with the model")
+        sys.exit(1)
+    print("\nSummary: The page matches the model")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
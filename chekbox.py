@@ -1,147 +1,242 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.support.ui import WebDriverWait 
 from selenium.webdriver.support import expected_conditions as EC
-import time
 import os
+import sys
+import time
+import drivers
+from results import ResultWriter, describe, make_record, summarize
+from locators import find, locator, print_stats
+from capture import artifacts_dir, note, on_failure
+from perf import assert_within, measure, paused, print_timings
+from timeouts import until
+from waits import settled_text, wait_for_quiet, print_report
 
 # Constantes du Test
-URL = "https://demoqa.com/checkbox"
-# XPath générique pour localiser l'icône de la CheckBox
-XPATH_CHECKBOX_BY_NAME = "//label[text()='{}']/span[@class='rct-checkbox']"
-# LOCATOR AJOUTÉ : Pour le bouton "Expand All"
-XPATH_EXPAND_ALL_BUTTON = "//button[@title='Expand all']" 
-# ID de l'élément qui affiche le résultat (ID_RESULT)
-ID_RESULT = "result" 
-# NOUVELLE CONSTANTE : XPath pour l'élément 'Home'
-XPATH_HOME_LABEL = "//label[text()='Home']"
-
-# Crée un dossier pour les captures d'écran en cas d'échec inattendu
-if not os.path.exists("preuves_automatisation_checkbox"):
-    os.makedirs("preuves_automatisation_checkbox")
+# DEMOQA_BASE_URL bascule vers les copies locales (voir fixture_server.py)
+BASE_URL = os.environ.get("DEMOQA_BASE_URL", "https://demoqa.com").rstrip("/")
+URL = f"{BASE_URL}/checkbox"
+# Les locators (case à cocher par nom, 'Expand All', 'Home', résultat) sont déclarés
+# une seule fois dans locators.py, sous le préfixe "chekbox."
+# ID de l'élément qui affiche le résultat (ID_RESULT), passé aux scripts JS
+ID_RESULT = locator("chekbox.result")[1]
+
+# Budget de la cascade 'Home' en ms, fenêtre de calme de 150 ms comprise (voir perf.py)
+CASCADE_BUDGET_MS = 1500
+
+# Dossier des captures d'écran en cas d'échec inattendu
+SCREENSHOT_DIR = "preuves_automatisation_checkbox"
 
 def expand_all_tree(driver):
     """Clique sur le bouton 'Expand All' pour s'assurer que tous les éléments sont dans le DOM."""
     try:
-        expand_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, XPATH_EXPAND_ALL_BUTTON))
-        )
-        expand_button.click()
+        # 10 s au plus ; ensuite le délai appris de l'historique (voir timeouts.py)
+        expand_button = until(driver, "expand_all_tree", EC.element_to_be_clickable(locator("chekbox.expand_all")), 10)
+        # Temps de rendu de la page mesuré jusqu'à ce que l'arbre ne bouge plus (voir perf.py)
+        with measure(driver, "expand_all_tree"):
+            expand_button.click()
+            # Attend que l'arbre ne bouge plus (remplace un time.sleep(1) fixe)
+            wait_for_quiet(driver, "expand_all_tree", baseline=1.0)
         print("Arborescence entièrement déployée (Expand All cliqué).")
-        time.sleep(1) 
     except Exception:
         # Tente de cliquer sur l'icône de réduction du Home (si le bouton Expand All est absent)
         try:
-             driver.find_element(By.CLASS_NAME, "rct-collapse-btn").click()
+             find(driver, "chekbox.collapse").click()
         except NoSuchElementException:
              pass 
 
-def setup_driver():
-    """Initialise, ouvre le navigateur ET DÉPLOIE L'ARBORESCENCE."""
-    driver = webdriver.Chrome()
-    driver.get(URL)
-    driver.maximize_window()
-    
+def make_driver(headless: bool = False):
+    """Crée le navigateur Chrome via la fabrique partagée (drivers.py)."""
+    # Pas d'attente implicite : les lectures de l'arbre ne doivent jamais l'attendre
+    return drivers.make_driver(headless=headless, implicit_wait=0)
+
+def open_tree(driver):
+    """Ouvre la page et déploie l'arborescence."""
     # 🌟 CORRECTION CLÉ : Attendre l'élément 'Home' (statique) au lieu de 'ID_RESULT' (dynamique)
     print("Attente de l'élément principal 'Home'...")
-    WebDriverWait(driver, 20).until( 
-        EC.presence_of_element_located((By.XPATH, XPATH_HOME_LABEL))
-    )
+    drivers.open_page(driver, URL, locator("chekbox.home"), timeout=20, name="chekbox")
     
     expand_all_tree(driver) 
+
+def setup_driver():
+    """Initialise, ouvre le navigateur ET DÉPLOIE L'ARBORESCENCE."""
+    # Le runner parallèle lance les navigateurs en headless via DEMOQA_HEADLESS=1
+    driver = make_driver(headless=os.environ.get("DEMOQA_HEADLESS") == "1")
+    driver.maximize_window()
+    open_tree(driver)
     return driver
 
-def save_screenshot(driver, test_id, description):
-    """Prend une capture d'écran avec un nom de fichier horodaté et descriptif."""
-    filename = f"preuves_automatisation_checkbox/{test_id}_ECHEC_{description}_{int(time.time())}.png"
-    driver.save_screenshot(filename)
-    return filename
+# Instantané complet de l'arbre en UN seul aller-retour WebDriver :
+# chaque nœud affiché (libellé, état rct-icon-*, déployé ou non, parent) + la liste #result
+JS_TREE_SNAPSHOT = """
+const nodes = [];
+for (const li of document.querySelectorAll('li.rct-node')) {
+    const label = li.querySelector(':scope > .rct-text > label');
+    if (!label) continue;
+    const icon = label.querySelector('.rct-checkbox svg');
+    const cls = icon ? icon.getAttribute('class') || '' : '';
+    const state = (cls.match(/rct-icon-(half-check|uncheck|check)\\b/) || [null, null])[1];
+    const parentLi = li.parentElement.closest('li.rct-node');
+    const parentLabel = parentLi ? parentLi.querySelector(':scope > .rct-text > label') : null;
+    nodes.push({
+        label: label.textContent.trim(),
+        state: state,
+        expanded: li.classList.contains('rct-node-leaf') ? null : li.classList.contains('rct-node-expanded'),
+        parent: parentLabel ? parentLabel.textContent.trim() : null
+    });
+}
+const result = document.getElementById(arguments[0]);
+let items = [];
+if (result) {
+    items = [...result.querySelectorAll('.text-success')].map(s => s.textContent.trim());
+    if (!items.length) {
+        items = result.textContent.replace('You have selected :', '').split(/[\\s,]+/).filter(Boolean);
+    }
+}
+return {nodes: nodes, result: items};
+"""
 
-def click_checkbox(driver, name):
-    """Clique sur la case à cocher associée à un nom de texte donné."""
-    checkbox_xpath = XPATH_CHECKBOX_BY_NAME.format(name)
-    WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.XPATH, checkbox_xpath))
+def snapshot_tree(driver):
+    """Lit tout l'arbre via un seul execute_script.
+
+    Retourne {"nodes": {libellé: {"state", "expanded", "parent"}}, "result": [valeurs]}
+    où state vaut "check", "uncheck" ou "half-check" et expanded vaut None pour une feuille.
+    Les assertions se font ensuite en local, sans autre aller-retour.
+    """
+    return parse_snapshot(driver.execute_script(JS_TREE_SNAPSHOT, ID_RESULT))
+
+def parse_snapshot(raw):
+    """Convertit le retour brut de JS_TREE_SNAPSHOT en instantané indexé par libellé."""
+    nodes = {n["label"]: {"state": n["state"], "expanded": n["expanded"], "parent": n["parent"]} for n in raw["nodes"]}
+    return {"nodes": nodes, "result": raw["result"]}
+
+def node_state(snapshot, name):
+    """État d'un nœud dans un instantané ("check", "uncheck", "half-check", ou None s'il n'est pas affiché)."""
+    node = snapshot["nodes"].get(name)
+    return node["state"] if node else None
+
+def is_clean(snapshot):
+    """Arbre propre : sur la page, rien de coché, rien de replié, aucun résultat."""
+    nodes = snapshot["nodes"].values()
+    return (
+        "Home" in snapshot["nodes"]
+        and all(n["state"] == "uncheck" for n in nodes)
+        and all(n["expanded"] is not False for n in nodes)
+        and not snapshot["result"]
     )
-    driver.find_element(By.XPATH, checkbox_xpath).click()
-    time.sleep(0.5) 
-    
-def get_result_text(driver):
-    """Récupère le texte complet de la zone de résultat."""
-    try:
-        # L'élément ID_RESULT est créé seulement après la première interaction.
-        return driver.find_element(By.ID, ID_RESULT).text.replace("You have selected :", "").strip()
-    except NoSuchElementException:
-        return ""
 
-# (Le reste du code des tests est inchangé)
-# ... (test_tc_cb_03_cascade_positive, test_tc_cb_05_etat_partiel, test_tc_cb_06_affichage_resultat, et le bloc if __name__ main) ...
+def reset_tree(driver):
+    """Remet l'arbre à zéro entre deux tests sans relancer Chrome.
+
+    Décoche tout en page via 'Home' (coché : 1 clic, partiel : 2 clics) ; si l'état
+    n'est toujours pas propre, vide le stockage et recharge la page. Lève une
+    AssertionError si l'arbre reste sale, pour ne jamais polluer le test suivant.
+    """
+    snap = snapshot_tree(driver)
+    # Clics de remise à zéro : hors mesure, ils fausseraient le budget du test suivant
+    with paused():
+        if "Home" in snap["nodes"]:
+            home = node_state(snap, "Home")
+            if home == "half-check":
+                click_checkbox(driver, "Home")
+                click_checkbox(driver, "Home")
+            elif home == "check":
+                click_checkbox(driver, "Home")
+            snap = snapshot_tree(driver)
+            if any(n["expanded"] is False for n in snap["nodes"].values()):
+                expand_all_tree(driver)
+                snap = snapshot_tree(driver)
+    if not is_clean(snap):
+        print("Réinitialisation en page insuffisante : nettoyage du stockage et rechargement.")
+        driver.delete_all_cookies()
+        if "Home" in snap["nodes"]:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        open_tree(driver)
+        snap = snapshot_tree(driver)
+    assert is_clean(snap), f"L'arbre n'est pas revenu à l'état initial : {snap}"
+    return driver
+
+def start_session():
+    """Démarre UN navigateur partagé par tous les tests de la session."""
+    return setup_driver()
+
 def save_screenshot(driver, test_id, description):
-    """Prend une capture d'écran avec un nom de fichier horodaté et descriptif."""
-    filename = f"preuves_automatisation_checkbox/{test_id}_ECHEC_{description}_{int(time.time())}.png"
-    driver.save_screenshot(filename)
-    return filename
+    """Capture d'échec (PNG + dernières étapes), écrite en arrière-plan dans le dossier du run."""
+    return on_failure(driver, f"{test_id}_ECHEC_{description}", subdir=SCREENSHOT_DIR)
+
+def preuves_echec(driver, nom_test):
+    """Capture d'un échec que le test n'a pas capturé lui-même (liste vide si la page ne répond plus)."""
+    try:
+        return [on_failure(driver, nom_test, subdir=SCREENSHOT_DIR)]
+    except Exception:
+        return []
 
 def click_checkbox(driver, name):
     """Clique sur la case à cocher associée à un nom de texte donné."""
-    checkbox_xpath = XPATH_CHECKBOX_BY_NAME.format(name)
+    # Poignée mise en cache pour la page : pas de nouveau find_element au clic suivant
+    case = find(driver, "chekbox.checkbox", name=name)
     # Utilisation d'une attente pour s'assurer que l'élément est cliquable APRÈS l'expansion
-    WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.XPATH, checkbox_xpath))
-    )
-    driver.find_element(By.XPATH, checkbox_xpath).click()
-    time.sleep(0.5) # Petite attente pour que l'état se mette à jour
+    until(driver, "click_checkbox", EC.element_to_be_clickable(case), 10)
+    with measure(driver, f"click_checkbox:{name}"):
+        case.click()
+        # Attend que l'état se mette à jour (remplace un time.sleep(0.5) fixe)
+        wait_for_quiet(driver, "click_checkbox", baseline=0.5)
+    note(driver, f"click_checkbox:{name}")
     
 def get_result_text(driver):
-    """Récupère le texte complet de la zone de résultat."""
-    try:
-        return driver.find_element(By.ID, ID_RESULT).text.replace("You have selected :", "").strip()
-    except NoSuchElementException:
-        return ""
-# ... (La fonction test_tc_cb_03_cascade_positive, test_tc_cb_05_etat_partiel, et test_tc_cb_06_affichage_resultat sont inchangées ici) ...
+    """Récupère le texte complet de la zone de résultat ("" si absente, sans attendre de délai)."""
+    # Lu une fois l'arbre stabilisé, avec l'attente implicite coupée (voir waits.py)
+    return settled_text(driver, locator("chekbox.result"), "get_result_text").replace("You have selected :", "").strip()
 def is_parent_partial(driver, parent_name):
     """Vérifie si le parent est en état Partiel (présence de la classe 'rct-icon-half-check')."""
-    xpath_parent = XPATH_CHECKBOX_BY_NAME.format(parent_name) + "/svg"
-    try:
-        # Vérifie si l'icône de l'état partiel est présente dans l'icône CheckBox du parent
-        parent_element = driver.find_element(By.XPATH, xpath_parent)
-        # La classe CSS 'rct-icon-half-check' indique l'état partiel (le tiret '-')
-        return "rct-icon-half-check" in parent_element.get_attribute("class")
-    except NoSuchElementException:
-        return False
-
-def test_tc_cb_03_cascade_positive():
+    # Lu depuis l'instantané : un seul aller-retour, et pas de souci d'espace de noms SVG en XPath
+    return node_state(snapshot_tree(driver), parent_name) == "half-check"
+
+def test_tc_cb_03_cascade_positive(driver=None):
     """Vérifie que cocher 'Home' coche TOUS les éléments (17 au total)."""
     test_id = "TC-CB-03"
-    driver = setup_driver()
+    # Sans driver fourni, le test démarre (et ferme) son propre navigateur
+    own_driver = driver is None
+    driver = setup_driver() if own_driver else reset_tree(driver)
     try:
         # 1. Étapes : Cocher Home (Maintenant l'élément est trouvé car l'arbre est déployé)
         click_checkbox(driver, "Home")
+        # La cascade (16 résultats affichés) doit se stabiliser dans son budget
+        assert_within("click_checkbox:Home", settle_ms=CASCADE_BUDGET_MS)
         
         # 2. ASSERTION : Le message de résultat doit contenir tous les éléments attendus.
         expected_items = ["desktop", "notes", "commands", "documents", "workspace", "react", "angular", "veu", 
                           "office", "public", "private", "classified", "general", "downloads", "wordFile", "excelFile"]
         
-        result_text = get_result_text(driver)
+        # Un seul aller-retour pour tout l'arbre, puis assertions en local
+        snapshot = snapshot_tree(driver)
+        result_items = [value.lower() for value in snapshot["result"]]
         
         # Vérifier si TOUS les mots clés attendus sont dans le résultat affiché
         for item in expected_items:
-            assert item.lower() in result_text.lower(), f"L'élément '{item}' n'a pas été trouvé dans le résultat après la cascade."
+            assert item.lower() in result_items, f"L'élément '{item}' n'a pas été trouvé dans le résultat après la cascade."
+        unchecked = [name for name, node in snapshot["nodes"].items() if node["state"] != "check"]
+        assert not unchecked, f"Nœuds non cochés après la cascade : {unchecked}"
 
         print(f"[{test_id} PASSÉ] : La cascade positive a réussi. Tous les éléments sont cochés.")
         
     except AssertionError as e:
         capture = save_screenshot(driver, test_id, "Cascade_Echouee")
         print(f"[{test_id} ÉCHOUÉ] : {e} Preuve : {capture}")
+        # Remonté pour que l'échec compte dans le code de sortie et les résultats ; la capture
+        # voyage avec l'exception pour que le runner n'en refasse pas une
+        e.artifacts = [capture]
+        raise
         
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
 
-def test_tc_cb_05_etat_partiel():
+def test_tc_cb_05_etat_partiel(driver=None):
     """Vérifie que le parent Documents passe à l'état Partiel après la désélection d'un enfant."""
     test_id = "TC-CB-05"
-    driver = setup_driver()
+    # Sans driver fourni, le test démarre (et ferme) son propre navigateur
+    own_driver = driver is None
+    driver = setup_driver() if own_driver else reset_tree(driver)
     try:
         # 1. Étapes : Cocher le Parent 'Documents' (sélectionne tous ses enfants)
         click_checkbox(driver, "Documents")
@@ -154,19 +249,26 @@ def test_tc_cb_05_etat_partiel():
             print(f"[{test_id} PASSÉ] : Le parent 'Documents' a correctement affiché l'état Partiel.")
         else:
             capture = save_screenshot(driver, test_id, "Etat_Partiel_Echoue")
-            raise AssertionError(f"[{test_id} ÉCHOUÉ] : Le parent 'Documents' n'est pas passé à l'état Partiel. Preuve : {capture}")
+            erreur = AssertionError(f"[{test_id} ÉCHOUÉ] : Le parent 'Documents' n'est pas passé à l'état Partiel. Preuve : {capture}")
+            erreur.artifacts = [capture]
+            raise erreur
 
     except AssertionError as e:
         print(e)
+        raise
     except Exception as e:
         print(f"[{test_id} ERREUR TECHNIQUE] : {e}")
+        raise
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
 
-def test_tc_cb_06_affichage_resultat():
+def test_tc_cb_06_affichage_resultat(driver=None):
     """Vérifie que l'affichage de résultat correspond exactement aux sélections."""
     test_id = "TC-CB-06"
-    driver = setup_driver()
+    # Sans driver fourni, le test démarre (et ferme) son propre navigateur
+    own_driver = driver is None
+    driver = setup_driver() if own_driver else reset_tree(driver)
     try:
         # 1. Étapes : Sélectionner des éléments non liés
         click_checkbox(driver, "Desktop")
@@ -184,16 +286,46 @@ def test_tc_cb_06_affichage_resultat():
     except AssertionError as e:
         capture = save_screenshot(driver, test_id, "Resultat_Format_Echoue")
         print(f"[{test_id} ÉCHOUÉ] : {e} Preuve : {capture}")
+        e.artifacts = [capture]
+        raise
         
     finally:
-        driver.quit()
+        if own_driver:
+            driver.quit()
 if __name__ == "__main__":
     print("--- DÉMARRAGE DE L'AUTOMATISATION CHECKBOX (Phase 4) ---")
     
-    # Exécution des tests
-    test_tc_cb_03_cascade_positive()
-    test_tc_cb_05_etat_partiel()
-    test_tc_cb_06_affichage_resultat()
+    # Exécution des tests sur un seul navigateur, remis à zéro entre chaque test
+    driver = start_session()
+    # Une ligne de résultat écrite (et vidée sur disque) dès qu'un test se termine
+    writer = ResultWriter()
+    try:
+        for test in (test_tc_cb_03_cascade_positive, test_tc_cb_05_etat_partiel, test_tc_cb_06_affichage_resultat):
+            writer.start("chekbox", test.__name__)
+            debut = time.perf_counter()
+            statut, message, preuves = "PASS", "", []
+            try:
+                test(driver)
+            except AssertionError as e:
+                statut, message = "FAIL", str(e)
+                preuves = getattr(e, "artifacts", None) or preuves_echec(driver, test.__name__)
+            except Exception as e:
+                # Une erreur technique n'a pas de capture : on prend celle de la page telle qu'elle est restée
+                statut, message = "ERROR", f"Unexpected: {e}"
+                preuves = getattr(e, "artifacts", None) or preuves_echec(driver, test.__name__)
+            # Les dépassements de budget (perf.py) sont affichés et enregistrés avec le résultat du test
+            resultat = make_record("chekbox", test.__name__, statut, time.perf_counter() - debut, message, preuves)
+            print(describe(resultat))
+            writer.write(resultat)
+    finally:
+        writer.close()
+        driver.quit()
 
+    print_report()
+    print_stats()
+    print_timings()
     print("\n--- SUITE DE TESTS CHECKBOX TERMINÉE ---")
-    print("Vérifiez les résultats dans la console et les captures d'écran dans le dossier 'preuves_automatisation_checkbox'.")
\ No newline at end of file
+    print(f"Vérifiez les résultats dans la console et les captures d'écran dans le dossier '{artifacts_dir(SCREENSHOT_DIR)}'.")
+    print(f"Résultats : {writer.path}")
+    # Même bilan que runner.py : tests hors budget et échecs, qui seuls donnent le code de sortie 1
+    sys.exit(summarize(writer.records))
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""Event-based download completion detection.
+
+``DownloadWatcher`` is armed on the (per-run) download folder before the click
+that starts a download. On Linux it listens to inotify: Chrome writes
+``<name>.crdownload`` and renames it to ``<name>`` once the download is complete,
+so ``IN_MOVED_TO`` (or ``IN_CLOSE_WRITE`` for a direct write) marks completion the
+moment it happens. Elsewhere it falls back to a short-interval scan of that one
+folder. Each completed download is reported with its size, elapsed time and a
+streaming SHA-256.
+
+    with DownloadWatcher(folder) as watcher:
+        button.click()
+        download = watcher.wait(timeout=25)
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from urllib.request import urlopen
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+POLL_INTERVAL = 0.05
+CHUNK = 1024 * 1024
+
+
+def is_partial(name: str) -> bool:
+    return name.startswith(".") or name.endswith(PARTIAL_SUFFIXES)
+
+
+def sha256_of(path: str) -> str:
+    """Hash the file in 1 MB chunks so large downloads never sit in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sha256_of_url(url: str, timeout: float = 10.0) -> str | None:
+    """Digest of what ``url`` serves (http or ``data:``), read outside the browser; None if unreadable."""
+    digest = hashlib.sha256()
+    try:
+        with urlopen(url, timeout=timeout) as r:
+            for block in iter(lambda: r.read(CHUNK), b""):
+                digest.update(block)
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+class DownloadWatcher:
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.started = time.perf_counter()
+        self._fd = None
+        self._pending = []
+        self._seen = set(os.listdir(folder))
+        libc = _load_libc()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "scan"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_events(self, timeout: float) -> list[str]:
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def _scan(self, timeout: float) -> list[str]:
+        time.sleep(min(POLL_INTERVAL, max(0.0, timeout)))
+        with os.scandir(self.folder) as entries:
+            return [e.name for e in entries if e.name not in self._seen]
+
+    def wait(self, timeout: float = 25.0, expected_sha256: str | None = None) -> dict | None:
+        """Return the next completed download, or None when ``timeout`` expires.
+
+        The result holds ``path``, ``size``, ``elapsed`` (seconds since the watcher
+        was armed) and ``sha256``; ``ok`` is False if ``expected_sha256`` differs.
+        """
+        end = time.perf_counter() + timeout
+        while True:
+            while self._pending:
+                name = self._pending.pop(0)
+                path = os.path.join(self.folder, name)
+                if name in self._seen or is_partial(name) or not os.path.isfile(path):
+                    continue
+                self._seen.add(name)
+                elapsed = time.perf_counter() - self.started
+                digest = sha256_of(path)
+                return {
+                    "path": path,
+                    "size": os.path.getsize(path),
+                    "elapsed": round(elapsed, 3),
+                    "sha256": digest,
+                    "ok": expected_sha256 is None or digest == expected_sha256,
+                }
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                return None
+            self._pending.extend(self._read_events(remaining) if self._fd is not None else self._scan(remaining))
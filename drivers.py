@@ -0,0 +1,199 @@
+"""Shared Chrome factory for the four suites.
+
+``make_driver`` replaces the per-suite copies. The ``fast`` profile (default)
+uses ``pageLoadStrategy=eager``, disables extensions, blocks ad/analytics hosts
+through DevTools ``Network.setBlockedURLs`` and can turn images off;
+``DEMOQA_DRIVER_PROFILE=default`` restores the old full-load behaviour so both
+can be compared. ``open_page`` gates readiness on the page's own key element
+rather than the load event and records how long it took, tagged with the
+profile, in the wait report. When ``browser_daemon.py`` is running,
+``make_driver`` attaches to one of its warmed browsers instead of launching
+Chrome, and hands it back clean on ``quit()``.
+"""
+import os
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+
+import browser_daemon
+import locators
+import timeouts
+import netcache
+import resources
+from instrumentation import maybe_instrument
+from waits import record
+
+PROFILES = ("fast", "default")
+
+# Third-party hosts the demoqa pages pull in; none of them matter to the tests
+BLOCKED_URLS = [
+    "*googlesyndication.com*",
+    "*doubleclick.net*",
+    "*googleadservices.com*",
+    "*adservice.google.*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googletagservices.com*",
+    "*amazon-adsystem.com*",
+    "*adsafeprotected.com*",
+    "*moatads.com*",
+    "*criteo.com*",
+    "*pubmatic.com*",
+    "*rubiconproject.com*",
+    "*taboola.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+]
+
+
+def current_profile() -> str:
+    profile = os.environ.get("DEMOQA_DRIVER_PROFILE", "fast")
+    if profile not in PROFILES:
+        raise ValueError(f"DEMOQA_DRIVER_PROFILE must be one of {PROFILES}, got {profile!r}")
+    return profile
+
+
+def images_enabled(profile: str, images: bool | None = None) -> bool:
+    if images is None:
+        return profile != "fast" or os.environ.get("DEMOQA_IMAGES", "1") != "0"
+    return images
+
+
+def build_options(headless: bool = False, profile: str | None = None, download_dir: str | None = None,
+                  images: bool | None = None) -> Options:
+    profile = profile or current_profile()
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,900")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    prefs = {}
+    if profile == "fast":
+        # Return at DOMContentLoaded; open_page waits for the element the test needs instead
+        options.page_load_strategy = "eager"
+        options.add_argument("--disable-extensions")
+    if not images_enabled(profile, images):
+        prefs["profile.managed_default_content_settings.images"] = 2
+    if download_dir:
+        prefs.update({
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True,
+        })
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    return options
+
+
+def block_third_party(driver, patterns=BLOCKED_URLS):
+    """Drop requests to ad/analytics hosts in this browser (Chrome DevTools only)."""
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def make_driver(headless: bool = False, download_dir: str | None = None, implicit_wait: float = 5,
+                profile: str | None = None, images: bool | None = None):
+    profile = profile or current_profile()
+    remote = os.environ.get("DEMOQA_REMOTE_URL")
+    # Daemon browsers are launched with images on; turning them off needs a fresh Chrome
+    lease = browser_daemon.acquire(headless) if images_enabled(profile, images) and not remote else None
+    if remote:
+        # Grid, Selenium standalone or a bare chromedriver; downloads land on that machine
+        drv = webdriver.Remote(command_executor=remote, options=build_options(headless, profile, download_dir, images))
+    elif lease is not None:
+        drv = attach(lease, profile, download_dir)
+    else:
+        options = build_options(headless, profile, download_dir, images)
+        # Selenium Manager (Selenium >=4.6) resolves chromedriver automatically
+        drv = webdriver.Chrome(options=options)
+    drv.profile_name = profile
+    # Read by waits.no_implicit_wait so explicit waits and absence checks never stack on it
+    drv.implicit_wait_s = implicit_wait
+    if implicit_wait:
+        drv.implicitly_wait(implicit_wait)
+    if profile == "fast":
+        block_third_party(drv)
+    # Replays recorded assets when DEMOQA_NETCACHE=1
+    netcache.install(drv)
+    # RSS/CPU/open files of its process tree, attached to each test's result
+    resources.watch(drv)
+    close = drv.quit
+
+    def quit():
+        resources.unwatch(drv)
+        close()
+
+    drv.quit = quit
+    return maybe_instrument(drv)
+
+
+def attach(lease, profile: str, download_dir: str | None = None):
+    """Drive a daemon browser; ``quit()`` resets it and hands it back."""
+    options = Options()
+    options.debugger_address = lease.address
+    if profile == "fast":
+        options.page_load_strategy = "eager"
+    # The daemon already resolved chromedriver, skip Selenium Manager
+    service = Service(executable_path=lease.chromedriver) if lease.chromedriver else None
+    try:
+        drv = webdriver.Chrome(options=options, service=service)
+    except Exception:
+        lease.release(clean=False)
+        raise
+    if download_dir:
+        os.makedirs(download_dir, exist_ok=True)
+        drv.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    drv.browser_pid = lease.pid
+    detach = drv.quit
+
+    def quit():
+        try:
+            reset_attached(drv)
+            # A recycled browser grew too big or ran too long: the daemon restarts it
+            clean = not getattr(drv, "recycled", False)
+        except Exception:
+            clean = False
+        try:
+            # chromedriver leaves an attached browser running
+            detach()
+        finally:
+            lease.release(clean)
+
+    drv.quit = quit
+    return drv
+
+
+def reset_attached(driver):
+    """Leave a shared browser as the daemon handed it out: one blank tab, no state."""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    origin = driver.execute_script("return location.origin")
+    if origin and origin.startswith("http"):
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "default"})
+    driver.get("about:blank")
+
+
+def open_page(driver, url: str, ready_locator, timeout: float = 10, name: str | None = None):
+    """Navigate and return once ``ready_locator`` is present (not on the load event)."""
+    start = time.perf_counter()
+    # Element handles from the previous page are of no use any more
+    locators.forget(driver)
+    driver.get(url)
+    label = f"open_page:{name or url.rsplit('/', 1)[-1]}[{getattr(driver, 'profile_name', 'default')}]"
+    # ``timeout`` is the ceiling; once the page has a history the learned value is used
+    timeouts.until(driver, label, EC.presence_of_element_located(ready_locator), timeout)
+    record(label, time.perf_counter() - start)
@@ -0,0 +1,75 @@
+"""Per-test duration history, used to balance shards by time rather than by count.
+
+``.test_durations.json`` maps ``module.test`` to a moving average of its
+duration in seconds. ``partition`` hands the longest tests out first, each to
+the shard with the least work so far; since it only depends on the test list
+and this file, every machine computes the same split for ``--shard I/N``.
+"""
+import json
+import os
+import statistics
+
+STORE = os.environ.get("DEMOQA_DURATIONS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".test_durations.json")
+# Weight of the latest run in the moving average
+ALPHA = 0.3
+# Guess for a test that never ran, when nothing else is known
+DEFAULT_SECONDS = 10.0
+
+
+def load(path: str = STORE) -> dict[str, float]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def update(records, path: str = STORE):
+    """Fold a run's result records (see results.py) into the history."""
+    known = load(path)
+    for record in records:
+        seconds = record["duration"]
+        # A test that never started (dead worker) says nothing about its duration
+        if not seconds:
+            continue
+        key = f"{record['suite']}.{record['name']}"
+        known[key] = round(seconds if key not in known else ALPHA * seconds + (1 - ALPHA) * known[key], 3)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(known, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def estimate(known: dict[str, float], test: tuple[str, str]) -> float:
+    key = f"{test[0]}.{test[1]}"
+    if key in known:
+        return known[key]
+    return statistics.median(known.values()) if known else DEFAULT_SECONDS
+
+
+def partition(tests, shards: int, known: dict[str, float] | None = None) -> list[list[tuple[str, str]]]:
+    known = load() if known is None else known
+    buckets = [[] for _ in range(shards)]
+    totals = [0.0] * shards
+    # Sorted by name as well so equal durations still split the same way everywhere
+    for test in sorted(tests, key=lambda t: (-estimate(known, t), t)):
+        i = totals.index(min(totals))
+        buckets[i].append(test)
+        totals[i] += estimate(known, test)
+    return buckets
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """``"2/3"`` -> ``(2, 3)``; shards are numbered from 1."""
+    index, _, total = text.partition("/")
+    index, total = int(index), int(total)
+    if not 1 <= index <= total:
+        raise ValueError(f"Shard must look like I/N with 1 <= I <= N, got {text!r}")
+    return index, total
+
+
+def select(tests, index: int, total: int, known: dict[str, float] | None = None) -> list[tuple[str, str]]:
+    """The tests of shard ``index`` (1-based) out of ``total``, in their original order."""
+    mine = set(partition(tests, total, known)[index - 1])
+    return [t for t in tests if t in mine]
@@ -0,0 +1,118 @@
+"""Data-driven email validation matrix for the text-box page.
+
+Reads cases from CSV or JSONL (columns/keys ``email`` and ``expected``, one of
+``valid``, ``invalid`` or ``empty``) and checks each one through ``userEmail``.
+The page is loaded once per worker and reused; cases are sent in batches, each
+batch being a single ``execute_script`` that fills, submits and reads the verdict
+for every case in it. All mismatches are returned at the end.
+
+    python email_matrix.py data/emails.csv --workers 2 --batch 50
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import textbox
+
+VERDICTS = ("valid", "invalid", "empty")
+
+# For every case: set the email through React's value setter, submit, then read the two
+# verdicts: the field-error class and an "Email:<value>" line in #output. A rejected email
+# leaves the previous output in place, so only a line carrying this exact value counts.
+JS_CHECK_BATCH = """
+const cases = arguments[0];
+const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+const email = document.getElementById('userEmail');
+const button = document.getElementById('submit');
+const results = [];
+for (const value of cases) {
+    setValue.call(email, value);
+    email.dispatchEvent(new Event('input', {bubbles: true}));
+    button.click();
+    const output = document.getElementById('output');
+    const text = output ? output.innerText : '';
+    results.push({
+        error: email.classList.contains('field-error'),
+        shown: value !== '' && text.split('\\n').some(line => line.trim() === 'Email:' + value)
+    });
+}
+return results;
+"""
+
+
+def load_cases(path: str) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    cases = []
+    for i, row in enumerate(rows, 1):
+        expected = (row.get("expected") or "").strip().lower()
+        if expected not in VERDICTS:
+            raise ValueError(f"{path}: case {i} has expected={expected!r}, want one of {VERDICTS}")
+        cases.append({"id": i, "email": row.get("email") or "", "expected": expected})
+    return cases
+
+
+def verdict(error: bool, shown: bool, email: str) -> str:
+    if error:
+        return "invalid" if not shown else "inconsistent"
+    if not email:
+        return "empty" if not shown else "inconsistent"
+    return "valid" if shown else "inconsistent"
+
+
+def run_worker(cases: list[dict], batch: int, headless: bool) -> list[dict]:
+    driver = textbox.make_driver(headless=headless)
+    try:
+        textbox.open_page(driver)
+        # The other fields never change: fill them once and reuse the page for every case
+        textbox.fill_form(driver, email="")
+        outcomes = []
+        for start in range(0, len(cases), batch):
+            chunk = cases[start:start + batch]
+            results = driver.execute_script(JS_CHECK_BATCH, [c["email"] for c in chunk])
+            for case, res in zip(chunk, results):
+                outcomes.append({**case, "actual": verdict(res["error"], res["shown"], case["email"])})
+        return outcomes
+    finally:
+        driver.quit()
+
+
+def run_matrix(cases: list[dict], workers: int = 1, batch: int = 50, headless: bool = True) -> list[dict]:
+    """Run every case; returns the mismatching ones (all of them, not just the first)."""
+    workers = max(1, min(workers, len(cases)))
+    shards = [cases[i::workers] for i in range(workers)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = [o for part in pool.map(lambda s: run_worker(s, batch, headless), shards) for o in part]
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"Checked {len(outcomes)} emails on {workers} workers in {elapsed:.1f}s "
+          f"({len(outcomes) / elapsed:.1f} cases/s)")
+    return sorted((o for o in outcomes if o["actual"] != o["expected"]), key=lambda o: o["id"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check many emails against the text-box validation.")
+    parser.add_argument("cases", help="CSV or JSONL file with email/expected")
+    parser.add_argument("--workers", type=int, default=1, help="browsers to spread the cases over")
+    parser.add_argument("--batch", type=int, default=50, help="cases per execute_script")
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args(argv)
+
+    mismatches = run_matrix(load_cases(args.cases), args.workers, args.batch, headless=not args.headed)
+    if mismatches:
+        print("\nSummary: Some emails were not judged as expected")
+        for m in mismatches:
+            print(f" - #{m['id']} {m['email']!r}: expected {m['expected']}, got {m['actual']}")
+        sys.exit(1)
+    print("\nSummary: All emails judged as expected")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
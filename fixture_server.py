@@ -0,0 +1,115 @@
+"""Local stand-in for the demoqa pages under test.
+
+Serves the copies in ``fixtures/`` (same ids, same client-side behaviour) so the
+suites can run offline at loopback latency. Point a run at it with
+``DEMOQA_BASE_URL``:
+
+    python fixture_server.py --port 8000
+    DEMOQA_BASE_URL=http://127.0.0.1:8000 python textbox.py
+
+or let the runner start one in-process with ``python runner.py --local``.
+"""
+import argparse
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PAGES = {
+    "/text-box": "text-box.html",
+    "/radio-button": "radio-button.html",
+    "/checkbox": "checkbox.html",
+    "/upload-download": "upload-download.html",
+    "/fixtures.css": "fixtures.css",
+}
+CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".css": "text/css; charset=utf-8"}
+
+# The live page hands out a small JPEG; ?size=<bytes> makes it as large as needed
+SAMPLE_FILE_SIZE = 4096
+CHUNK = 64 * 1024
+
+
+def sample_bytes(size: int):
+    """Yield a deterministic JPEG-framed payload of exactly ``size`` bytes."""
+    head, tail = b"\xff\xd8\xff\xe0", b"\xff\xd9"
+    body = max(0, size - len(head) - len(tail))
+    yield head[:size]
+    block = bytes(range(256)) * (CHUNK // 256)
+    while body > 0:
+        n = min(body, len(block))
+        yield block[:n]
+        body -= n
+    if size > len(head):
+        yield tail[: size - len(head)]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "DemoqaFixture/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(head_only=True)
+
+    def do_GET(self, head_only: bool = False):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/") or "/"
+        if path == "/sampleFile.jpeg":
+            size = int(parse_qs(url.query).get("size", [SAMPLE_FILE_SIZE])[0])
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition", 'attachment; filename="sampleFile.jpeg"')
+            self.end_headers()
+            if not head_only:
+                for chunk in sample_bytes(size):
+                    self.wfile.write(chunk)
+            return
+        name = PAGES.get(path)
+        if name is None:
+            self.send_error(404)
+            return
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[os.path.splitext(name)[1]])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(data)
+
+
+def start(host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """Start the server on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def stop(server: ThreadingHTTPServer):
+    server.shutdown()
+    server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve offline copies of the demoqa pages.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), FixtureHandler)
+    print(f"Serving demoqa fixtures on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Incremental test selection: skip tests whose code and page did not change since they passed.
+
+A test's code fingerprint hashes its source and, transitively, the repo
+functions, classes and constants it refers to (``click_checkbox``,
+``locator`` and ``LOCATORS``, ``JS_WAIT_QUIET``...), so editing a shared helper
+re-runs every test that uses it. Its page fingerprint hashes the HTML of the
+suite's ``URL`` and the same-origin script bundles it loads; a page that
+cannot be fetched never counts as unchanged. ``.result_cache.json`` keeps
+both fingerprints with each test's last result: a test is skipped only when
+it passed with the same two, and tests that failed last time run first.
+
+    python runner.py --incremental             # skip what is known to pass
+    python runner.py --incremental --force     # run everything, refresh the cache
+    python incremental.py                      # what --incremental would run and skip
+"""
+import argparse
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import re
+import time
+import types
+from urllib.parse import urljoin, urlparse
+from urllib.request import urlopen
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORE = os.environ.get("DEMOQA_RESULT_CACHE") or os.path.join(HERE, ".result_cache.json")
+SCRIPT_SRC = re.compile(rb"""<script[^>]+src=["']([^"']+)["']""", re.I)
+
+
+def load(path: str = STORE) -> dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _own(obj) -> bool:
+    """Defined in this repo (not Selenium, not the standard library)."""
+    try:
+        path = obj.__file__ if isinstance(obj, types.ModuleType) else inspect.getsourcefile(obj)
+    except (AttributeError, TypeError):
+        return False
+    return bool(path) and os.path.abspath(path).startswith(HERE + os.sep)
+
+
+def _names(code) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def _constant(name: str, value) -> str | None:
+    # Module constants only: lower-case and private globals are runtime state, and the
+    # *URL ones follow DEMOQA_BASE_URL (the page fingerprint stands for the target)
+    if not name.isupper() or name.startswith("_") or name.endswith("URL"):
+        return None
+    try:
+        return json.dumps(value, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+def code_fingerprint(fn) -> str:
+    """Hash of ``fn`` and everything of this repo it reaches by name."""
+    parts: dict[str, str] = {}
+    todo = [fn]
+    while todo:
+        current = inspect.unwrap(todo.pop())
+        key = f"{current.__module__}.{current.__qualname__}"
+        if key in parts:
+            continue
+        try:
+            parts[key] = inspect.getsource(current)
+        except (OSError, TypeError):
+            parts[key] = ""
+        if inspect.isclass(current):
+            continue
+        names = _names(current.__code__)
+        scopes = [current.__globals__]
+        # drivers.open_page, waits.JS_WAIT_QUIET...: attributes of the repo's modules
+        scopes += [vars(value) for name in names
+                   if isinstance(value := current.__globals__.get(name), types.ModuleType) and _own(value)]
+        for name in sorted(names):
+            for scope in scopes:
+                if name not in scope:
+                    continue
+                value = scope[name]
+                # inspect.unwrap sees through lru_cache (locators.locator)
+                if inspect.isfunction(inspect.unwrap(value)) or inspect.isclass(value):
+                    if _own(inspect.unwrap(value)):
+                        todo.append(value)
+                elif (text := _constant(name, value)) is not None:
+                    parts[f"{scope.get('__name__')}.{name}"] = text
+    digest = hashlib.sha256()
+    for key in sorted(parts):
+        digest.update(f"{key}\n{parts[key]}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def page_fingerprint(url: str, timeout: float = 10.0) -> str | None:
+    """Hash of the page's HTML and its same-origin scripts; None if anything fails to load."""
+    try:
+        with urlopen(url, timeout=timeout) as r:
+            html = r.read()
+        digest = hashlib.sha256(html)
+        # Third-party scripts (ads, analytics) change all the time and are not under test
+        for src in sorted(set(SCRIPT_SRC.findall(html))):
+            script = urljoin(url, src.decode())
+            if urlparse(script).netloc != urlparse(url).netloc:
+                continue
+            with urlopen(script, timeout=timeout) as r:
+                digest.update(r.read())
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()[:16]
+
+
+def fingerprints(test: tuple[str, str]) -> dict[str, str | None]:
+    mod = importlib.import_module(test[0])
+    return {"code": code_fingerprint(getattr(mod, test[1])), "page": page_fingerprint(mod.URL)}
+
+
+def failures(tests, cache: dict | None = None) -> set[tuple[str, str]]:
+    """The tests whose last cached result is not a pass."""
+    cache = load() if cache is None else cache
+    return {t for t in tests if cache.get(f"{t[0]}.{t[1]}", {}).get("status", "PASS") != "PASS"}
+
+
+def plan(tests, force: bool = False, cache: dict | None = None):
+    """``(to_run, skipped, prints)``: ``(test, reason)`` pairs, last failures first, and the fingerprints."""
+    cache = load() if cache is None else cache
+    prints = {test: fingerprints(test) for test in tests}
+    failed = failures(tests, cache)
+    to_run, skipped = [], []
+    for test in tests:
+        entry, current = cache.get(f"{test[0]}.{test[1]}"), prints[test]
+        if force or not entry or entry["status"] != "PASS" or current["page"] is None \
+                or entry["code"] != current["code"] or entry["page"] != current["page"]:
+            to_run.append((test, reason(entry, current, force)))
+        else:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["ts"]))
+            skipped.append((test, f"passed on {when} with the same code and page"))
+    # Stable: failures first, the rest in their original order
+    to_run.sort(key=lambda item: item[0] not in failed)
+    return to_run, skipped, prints
+
+
+def reason(entry: dict | None, current: dict, force: bool) -> str:
+    if force:
+        return "--force"
+    if not entry:
+        return "no cached result"
+    if entry["status"] != "PASS":
+        return f"last result {entry['status']}"
+    if current["page"] is None:
+        return "page could not be fingerprinted"
+    changed = [name for name in ("code", "page") if entry[name] != current[name]]
+    return " and ".join(changed) + " changed"
+
+
+def update(records: list[dict], prints: dict, path: str = STORE):
+    """Store each run test's result with the fingerprints it ran against."""
+    cache = load(path)
+    for record in records:
+        test = (record["suite"], record["name"])
+        if test not in prints:
+            continue
+        cache[f"{test[0]}.{test[1]}"] = {**prints[test], "status": record["status"], "ts": round(record["ts"], 3)}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def write_plan(to_run, skipped, path: str):
+    rows = [{"test": f"{s}.{n}", "action": "run", "reason": why} for (s, n), why in to_run]
+    rows += [{"test": f"{s}.{n}", "action": "skip", "reason": why} for (s, n), why in skipped]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=1)
+
+
+def print_plan(to_run, skipped):
+    print(f"Incremental: {len(to_run)} to run, {len(skipped)} skipped")
+    for (suite, name), why in to_run:
+        print(f" + {suite}.{name}: {why}")
+    for (suite, name), why in skipped:
+        print(f" - {suite}.{name}: {why}")
+
+
+def main(argv=None):
+    import runner
+
+    parser = argparse.ArgumentParser(description="Show what runner.py --incremental would run and skip.")
+    parser.add_argument("--suite", action="append", choices=runner.SUITES)
+    parser.add_argument("-k", dest="keyword")
+    args = parser.parse_args(argv)
+    to_run, skipped, _ = plan(runner.collect(tuple(args.suite or runner.SUITES), args.keyword))
+    print_plan(to_run, skipped)
+
+
+if __name__ == "__main__":
+    main()
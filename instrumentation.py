@@ -0,0 +1,171 @@
+"""Opt-in latency instrumentation for WebDriver commands and explicit waits.
+
+When enabled, every driver from ``make_driver``/``setup_driver`` has its
+``execute`` wrapped, so each WebDriver command (navigation, lookups, clicks,
+scripts, screenshots...) is timed, and ``WebDriverWait.until``/``until_not`` are
+timed too. Each sample is attributed to the running ``test_*`` function and to
+the innermost repo helper that issued it (``set_email``, ``submit``,
+``click_checkbox``, ``until``...), not the outer one the test called.
+
+    DEMOQA_PROFILE=profile.json python textbox.py     # report for one suite
+    python runner.py --profile                         # runs/<ts>/profile.json
+
+The report holds p50/p95/max and a latency histogram per test, per helper and
+per command.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+REPORT_ENV = "DEMOQA_PROFILE"
+# Set by the runner: each worker only dumps its raw samples there, the runner builds the report
+SAMPLES_ENV = "DEMOQA_PROFILE_SAMPLES"
+
+SUITE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Frames that are plumbing rather than a helper worth reporting
+IGNORED_FRAMES = {"<module>", "<lambda>", "<listcomp>", "<genexpr>", "main", "run_one", "worker",
+                  # locators.CachedElement's stale-handle retry around every element command
+                  "_execute"}
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_samples: list[tuple] = []
+_waits_patched = False
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(REPORT_ENV) or os.environ.get(SAMPLES_ENV))
+
+
+def _attribute() -> tuple[str, str]:
+    """(test, helper) for the code currently issuing a command, from the call stack."""
+    chain = []  # suite functions, innermost first
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(SUITE_DIR) and code.co_filename != __file__ \
+                and code.co_name not in IGNORED_FRAMES:
+            chain.append(code.co_name)
+        frame = frame.f_back
+    for i in range(len(chain) - 1, -1, -1):
+        if chain[i].startswith("test_"):
+            return chain[i], chain[0] if i > 0 else "(test body)"
+    return "(outside tests)", chain[0] if chain else "(direct)"
+
+
+def record(kind: str, name: str, seconds: float):
+    test, helper = _attribute()
+    _samples.append((test, helper, f"{kind}:{name}", seconds))
+
+
+def instrument(driver):
+    """Time every command sent through ``driver`` (idempotent)."""
+    if getattr(driver, "_profiled", False):
+        return driver
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return original(driver_command, params)
+        finally:
+            record("command", driver_command, time.perf_counter() - start)
+
+    driver.execute = execute
+    driver._profiled = True
+    _patch_waits()
+    return driver
+
+
+def maybe_instrument(driver):
+    return instrument(driver) if enabled() else driver
+
+
+def _patch_waits():
+    global _waits_patched
+    if _waits_patched:
+        return
+    _waits_patched = True
+    for name in ("until", "until_not"):
+        original = getattr(WebDriverWait, name)
+
+        def timed(self, method, message="", _original=original, _name=name):
+            start = time.perf_counter()
+            try:
+                return _original(self, method, message)
+            finally:
+                record("wait", _name, time.perf_counter() - start)
+
+        setattr(WebDriverWait, name, timed)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(seconds: list[float]) -> dict:
+    values = sorted(s * 1000 for s in seconds)
+    histogram = {f"<={b}ms": 0 for b in BUCKETS_MS}
+    histogram[f">{BUCKETS_MS[-1]}ms"] = 0
+    for v in values:
+        bucket = next((f"<={b}ms" for b in BUCKETS_MS if v <= b), f">{BUCKETS_MS[-1]}ms")
+        histogram[bucket] += 1
+    return {
+        "count": len(values),
+        "total_ms": round(sum(values), 2),
+        "p50_ms": round(_percentile(values, 50), 2),
+        "p95_ms": round(_percentile(values, 95), 2),
+        "max_ms": round(values[-1], 2) if values else 0.0,
+        "histogram": histogram,
+    }
+
+
+def build_report(samples) -> dict:
+    groups = {"per_test": defaultdict(list), "per_helper": defaultdict(list), "per_command": defaultdict(list)}
+    nested = defaultdict(lambda: defaultdict(list))
+    for test, helper, name, seconds in samples:
+        groups["per_test"][test].append(seconds)
+        groups["per_helper"][helper].append(seconds)
+        groups["per_command"][name].append(seconds)
+        nested[test][helper].append(seconds)
+    report = {key: {k: summarize(v) for k, v in sorted(g.items())} for key, g in groups.items()}
+    report["per_test_helper"] = {
+        test: {helper: summarize(v) for helper, v in sorted(helpers.items())} for test, helpers in sorted(nested.items())
+    }
+    return report
+
+
+def load_samples(folder: str) -> list[tuple]:
+    samples = []
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), encoding="utf-8") as f:
+                samples.extend(tuple(json.loads(line)) for line in f if line.strip())
+    return samples
+
+
+def write_report(samples, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_report(samples), f, indent=2)
+    print(f"Latency report: {path}")
+
+
+@atexit.register
+def dump():
+    """Write this process's samples (called at exit; runner workers call it explicitly)."""
+    if not _samples:
+        return
+    folder = os.environ.get(SAMPLES_ENV)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{os.getpid()}.jsonl"), "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(s) + "\n" for s in _samples)
+    elif os.environ.get(REPORT_ENV):
+        write_report(_samples, os.environ[REPORT_ENV])
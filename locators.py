@@ -0,0 +1,145 @@
+"""Named locators for the demoqa pages and a per-page cache of resolved elements.
+
+Every locator the suites use is declared once in ``LOCATORS``; parametrised
+ones (``{input_id}``, ``{name}``) are formatted once per argument and reused.
+``find`` resolves a name to a ``WebElement`` and keeps the handle until the
+next ``drivers.open_page``, so repeated lookups of the same field cost no
+round trip. A cached handle that has gone stale (React re-rendered the node)
+is re-resolved transparently on its next use. Hits, misses and re-resolutions
+are counted and printed with the wait report.
+"""
+import json
+import os
+from functools import lru_cache
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+
+LOCATORS = {
+    # text-box
+    "textbox.user_name": (By.ID, "userName"),
+    "textbox.email": (By.ID, "userEmail"),
+    "textbox.current_address": (By.ID, "currentAddress"),
+    "textbox.permanent_address": (By.ID, "permanentAddress"),
+    "textbox.submit": (By.ID, "submit"),
+    "textbox.output": (By.ID, "output"),
+    # radio-button
+    "radiobox.option": (By.CLASS_NAME, "custom-control"),
+    "radiobox.input": (By.ID, "{input_id}"),
+    "radiobox.label": (By.CSS_SELECTOR, 'label[for="{input_id}"]'),
+    "radiobox.result": (By.CLASS_NAME, "text-success"),
+    # checkbox
+    "chekbox.home": (By.XPATH, "//label[text()='Home']"),
+    "chekbox.checkbox": (By.XPATH, "//label[text()='{name}']/span[@class='rct-checkbox']"),
+    "chekbox.expand_all": (By.XPATH, "//button[@title='Expand all']"),
+    "chekbox.collapse": (By.CLASS_NAME, "rct-collapse-btn"),
+    "chekbox.result": (By.ID, "result"),
+    # upload-download
+    "upload.file_input": (By.ID, "uploadFile"),
+    "upload.uploaded_path": (By.ID, "uploadedFilePath"),
+    "upload.download_button": (By.ID, "downloadButton"),
+}
+
+STATS = {"hits": 0, "misses": 0, "stale": 0}
+
+
+@lru_cache(maxsize=None)
+def _compile(name: str, params: tuple) -> tuple[str, str]:
+    by, value = LOCATORS[name]
+    return by, value.format(**dict(params)) if params else value
+
+
+def locator(name: str, **params) -> tuple[str, str]:
+    """``(by, value)`` for a registered locator, e.g. ``locator("radiobox.label", input_id="yesRadio")``."""
+    return _compile(name, tuple(sorted(params.items())))
+
+
+class CachedElement(WebElement):
+    """A ``WebElement`` that finds itself again when its handle goes stale.
+
+    Element commands (click, text, send_keys, is_enabled...) and the
+    script-backed ``is_displayed``/``get_attribute`` (hence the expected
+    conditions) retry once on a fresh handle. Scripts given the element as an
+    argument (``driver.execute_script(js, element)``) do not.
+    """
+
+    def __init__(self, parent, id_, by_value: tuple[str, str]):
+        super().__init__(parent, id_)
+        self._locator = by_value
+
+    def _refind(self):
+        STATS["stale"] += 1
+        self._id = self._parent.find_element(*self._locator).id
+
+    def _execute(self, command, params=None):
+        try:
+            return super()._execute(command, params)
+        except StaleElementReferenceException:
+            self._refind()
+            return super()._execute(command, params)
+
+    def is_displayed(self) -> bool:
+        # Selenium runs it as a script with the element as argument, bypassing _execute
+        try:
+            return super().is_displayed()
+        except StaleElementReferenceException:
+            self._refind()
+            return super().is_displayed()
+
+    def get_attribute(self, name):
+        try:
+            return super().get_attribute(name)
+        except StaleElementReferenceException:
+            self._refind()
+            return super().get_attribute(name)
+
+
+def _cache(driver) -> dict:
+    cache = getattr(driver, "_element_cache", None)
+    if cache is None:
+        cache = driver._element_cache = {}
+    return cache
+
+
+def find(driver, name: str, **params) -> WebElement:
+    """Resolve a registered locator, reusing the handle found earlier on this page."""
+    by_value = locator(name, **params)
+    cache = _cache(driver)
+    element = cache.get(by_value)
+    if element is not None:
+        STATS["hits"] += 1
+        return element
+    STATS["misses"] += 1
+    element = cache[by_value] = CachedElement(driver, driver.find_element(*by_value).id, by_value)
+    return element
+
+
+def forget(driver):
+    """Drop the cached handles (called on every page load)."""
+    _cache(driver).clear()
+
+
+def dump(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(STATS, f)
+
+
+def load_stats(folder: str) -> dict:
+    total = dict.fromkeys(STATS, 0)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            with open(os.path.join(folder, name), encoding="utf-8") as f:
+                for key, value in json.load(f).items():
+                    total[key] = total.get(key, 0) + value
+    return total
+
+
+def print_stats(stats: dict | None = None):
+    stats = STATS if stats is None else stats
+    lookups = stats["hits"] + stats["misses"]
+    if not lookups:
+        return
+    print(f"\nElement cache: {stats['hits']}/{lookups} lookups served without find_element, "
+          f"{stats['stale']} stale handles re-resolved")
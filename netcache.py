@@ -0,0 +1,289 @@
+"""Record-and-replay cache for the assets the demoqa pages load.
+
+With ``DEMOQA_NETCACHE=1`` (or ``runner.py --net-cache``) every driver from
+``drivers.make_driver`` intercepts its page's requests through DevTools
+``Fetch``: a GET already in the store is fulfilled from disk, any other is
+recorded on its way back. Navigations stop re-downloading the JS, CSS, fonts
+and images, and replay the same bytes every run.
+
+The store is one ``<key>.json`` + ``<key>.bin`` pair per URL, so the runner's
+workers can share it without locking. It is bounded to ``DEMOQA_NETCACHE_MB``
+(least recently served entries go first) and emptied explicitly:
+
+    python netcache.py --stats
+    python netcache.py --invalidate            # everything
+    python netcache.py --invalidate jquery     # URLs containing "jquery"
+"""
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+CACHE_DIR = os.environ.get("DEMOQA_NETCACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".netcache")
+MAX_BYTES = int(float(os.environ.get("DEMOQA_NETCACHE_MB", "256")) * 1024 * 1024)
+# A single response above this is passed through (downloads, large uploads echoed back)
+MAX_ENTRY = 16 * 1024 * 1024
+RESOURCE_TYPES = ("Document", "Stylesheet", "Script", "Font", "Image")
+# The stored body is already decoded, so these would lie about it
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def enabled() -> bool:
+    return os.environ.get("DEMOQA_NETCACHE") == "1"
+
+
+def key_for(method: str, url: str) -> str:
+    return hashlib.sha256(f"{method} {url}".encode()).hexdigest()[:32]
+
+
+class Store:
+    """On-disk entries, evicted least-recently-used once over ``max_bytes``."""
+
+    def __init__(self, folder: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        return os.path.join(self.folder, f"{key}.json"), os.path.join(self.folder, f"{key}.bin")
+
+    def get(self, key: str) -> tuple[dict, bytes] | None:
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # The metadata file's mtime is the LRU clock
+        os.utime(meta_path)
+        return meta, body
+
+    def put(self, key: str, meta: dict, body: bytes):
+        meta_path, body_path = self._paths(key)
+        meta = dict(meta, size=len(body))
+        # Body first, metadata last: a reader never sees metadata without its body
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode())):
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, str, dict]]:
+        found = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    found.append((os.path.getmtime(path), name[:-5], json.load(f)))
+            except (OSError, ValueError):
+                continue
+        return sorted(found)
+
+    def remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(meta.get("size", 0) for _, _, meta in entries)
+        for _, key, meta in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= meta.get("size", 0)
+
+    def invalidate(self, pattern: str | None = None) -> int:
+        removed = 0
+        for _, key, meta in self.entries():
+            if pattern is None or pattern in meta.get("url", ""):
+                self.remove(key)
+                removed += 1
+        return removed
+
+
+class CDPSession:
+    """Minimal DevTools client on one target's websocket (commands + events)."""
+
+    def __init__(self, ws_url: str, on_event):
+        import websocket  # websocket-client, installed with Selenium
+
+        self.ws = websocket.create_connection(ws_url, enable_multithread=True, suppress_origin=True)
+        self.on_event = on_event
+        self.ids = itertools.count(1)
+        self.pending: dict[int, Future] = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._read, name="netcache-cdp", daemon=True)
+        self.thread.start()
+
+    def send(self, method: str, params: dict | None = None) -> Future:
+        future = Future()
+        with self.lock:
+            msg_id = next(self.ids)
+            self.pending[msg_id] = future
+        self.ws.send(json.dumps({"id": msg_id, "method": method, "params": params or {}}))
+        return future
+
+    def call(self, method: str, params: dict | None = None, timeout: float = 10.0) -> dict:
+        return self.send(method, params).result(timeout)
+
+    def _read(self):
+        try:
+            while True:
+                msg = json.loads(self.ws.recv())
+                if "id" in msg:
+                    with self.lock:
+                        future = self.pending.pop(msg["id"], None)
+                    if future is None:
+                        continue
+                    if "error" in msg:
+                        future.set_exception(RuntimeError(msg["error"].get("message", msg["error"])))
+                    else:
+                        future.set_result(msg.get("result", {}))
+                elif "method" in msg:
+                    self.on_event(msg["method"], msg.get("params", {}))
+        except Exception:
+            # Socket closed (close() or the browser went away): fail whatever still waits
+            with self.lock:
+                pending, self.pending = self.pending, {}
+            for future in pending.values():
+                future.cancel()
+
+    def close(self):
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+class Interceptor:
+    """Serves and records one driver's page requests through ``Fetch``."""
+
+    def __init__(self, driver, store: Store | None = None):
+        self.store = store or Store()
+        self.hits = self.misses = self.recorded = 0
+        address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+        target = driver.execute_cdp_cmd("Target.getTargetInfo", {})["targetInfo"]["targetId"]
+        # Handlers wait on their own CDP replies, so they must not run on the reader thread
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="netcache")
+        self.session = CDPSession(f"ws://{address}/devtools/page/{target}", self._on_event)
+        patterns = [{"urlPattern": "*", "resourceType": t, "requestStage": stage}
+                    for t in RESOURCE_TYPES for stage in ("Request", "Response")]
+        self.session.call("Fetch.enable", {"patterns": patterns})
+
+    def _on_event(self, method: str, params: dict):
+        if method == "Fetch.requestPaused":
+            self.executor.submit(self._paused, params)
+
+    def _paused(self, params: dict):
+        request_id = params["requestId"]
+        try:
+            if "responseStatusCode" in params or "responseErrorReason" in params:
+                self._record(params)
+            else:
+                self._serve(params)
+        except Exception:
+            # Never leave the page hanging on a paused request
+            self.session.send("Fetch.continueRequest", {"requestId": request_id})
+
+    def _serve(self, params: dict):
+        request = params["request"]
+        cached = self.store.get(key_for(request["method"], request["url"])) if request["method"] == "GET" else None
+        if cached is None:
+            self.misses += 1
+            self.session.send("Fetch.continueRequest", {"requestId": params["requestId"]})
+            return
+        meta, body = cached
+        self.hits += 1
+        self.session.send("Fetch.fulfillRequest", {
+            "requestId": params["requestId"],
+            "responseCode": meta["status"],
+            "responseHeaders": meta["headers"],
+            "body": base64.b64encode(body).decode(),
+        })
+
+    def _record(self, params: dict):
+        request_id = params["requestId"]
+        request = params["request"]
+        headers = params.get("responseHeaders", [])
+        lowered = {h["name"].lower(): h["value"] for h in headers}
+        cacheable = (
+            request["method"] == "GET"
+            and params.get("responseStatusCode") == 200
+            and "attachment" not in lowered.get("content-disposition", "")
+            and int(lowered.get("content-length", 0) or 0) <= MAX_ENTRY
+        )
+        if cacheable:
+            reply = self.session.call("Fetch.getResponseBody", {"requestId": request_id})
+            body = base64.b64decode(reply["body"]) if reply.get("base64Encoded") else reply["body"].encode()
+            if len(body) <= MAX_ENTRY:
+                self.store.put(key_for(request["method"], request["url"]), {
+                    "url": request["url"],
+                    "status": 200,
+                    "headers": [h for h in headers if h["name"].lower() not in DROPPED_HEADERS],
+                    "recorded": time.time(),
+                }, body)
+                self.recorded += 1
+        self.session.send("Fetch.continueRequest", {"requestId": request_id})
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+    def close(self):
+        # Fetch is scoped to this session, closing it stops the interception
+        self.session.close()
+        self.executor.shutdown(wait=False)
+
+
+def install(driver):
+    """Intercept ``driver``'s requests until it quits (when DEMOQA_NETCACHE=1)."""
+    # Needs the browser's DevTools port, which a remote driver does not expose
+    if not enabled() or not hasattr(driver, "execute_cdp_cmd"):
+        return driver
+    interceptor = Interceptor(driver)
+    quit_driver = driver.quit
+
+    def quit():
+        interceptor.close()
+        quit_driver()
+
+    driver.netcache = interceptor
+    driver.quit = quit
+    return driver
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or empty the network cache.")
+    parser.add_argument("--dir", default=CACHE_DIR)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--invalidate", nargs="?", const="", metavar="URL_PART",
+                       help="drop every entry, or those whose URL contains URL_PART")
+    group.add_argument("--stats", action="store_true")
+    args = parser.parse_args(argv)
+    store = Store(args.dir)
+    if args.invalidate is not None:
+        removed = store.invalidate(args.invalidate or None)
+        print(f"Removed {removed} entries from {args.dir}")
+        return
+    entries = store.entries()
+    size = sum(meta.get("size", 0) for _, _, meta in entries)
+    print(f"{len(entries)} entries, {size / 1024 / 1024:.1f} MB of {store.max_bytes / 1024 / 1024:.0f} MB ({args.dir})")
+    if args.stats:
+        for mtime, _, meta in reversed(entries):
+            print(f" {time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))} {meta.get('size', 0):>9} {meta['url']}")
+
+
+if __name__ == "__main__":
+    main()
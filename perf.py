@@ -0,0 +1,161 @@
+"""Front-end timings of the key page actions, checked against budgets.
+
+``measure`` wraps an action (the click and the settle wait after it) and
+records how long the page took to settle and, from DevTools
+``Performance.getMetrics``, the layout, style, script and task time the page
+spent meanwhile. Long tasks (over 50 ms on the main thread) come from a
+``PerformanceObserver`` in the page. ``settle_ms`` includes the quiet window of
+the settle wait (``waits.QUIET_MS``).
+
+Only the key actions are measured (``KEY_ACTIONS``): each measurement costs a
+few round trips, which every click of the suites should not pay.
+``DEMOQA_PERF=all`` measures every wrapped click, ``DEMOQA_PERF=0`` none, and
+set-up clicks run inside ``paused()`` are never measured.
+
+Each action has a budget (``BUDGETS``, by action name before the ``:``). A
+breach does not fail the test by itself: it is attached to the test's result
+record and listed in the run report next to the functional result. Tests
+that must hold a budget assert it with ``assert_within``.
+
+    DEMOQA_PERF=all python runner.py   # every click, not only the key actions
+    DEMOQA_PERF=0 python runner.py     # no measurements
+"""
+import os
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# The Home cascade, expand all, the form submit and one radio selection
+KEY_ACTIONS = {"click_checkbox:Home", "expand_all_tree", "submit", "click_option:yesRadio"}
+# Milliseconds, per field of a sample
+BUDGETS = {
+    "click_checkbox": {"settle_ms": 1500, "long_task_ms": 200},
+    "expand_all_tree": {"settle_ms": 2000, "long_task_ms": 200},
+    "submit": {"settle_ms": 1500, "long_task_ms": 200},
+    "click_option": {"settle_ms": 1000, "long_task_ms": 100},
+}
+# Performance.getMetrics durations (cumulative seconds) -> sample fields
+METRICS = {
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "style_ms",
+    "ScriptDuration": "script_ms",
+    "TaskDuration": "task_ms",
+}
+
+# Installs the observer on first call, then hands over (and clears) the long tasks seen since
+JS_LONG_TASKS = """
+const w = window;
+if (!w.__longTasks) {
+    w.__longTasks = [];
+    try {
+        new PerformanceObserver(list => { for (const e of list.getEntries()) w.__longTasks.push(e.duration); })
+            .observe({type: 'longtask'});
+    } catch (e) {}
+}
+return w.__longTasks.splice(0);
+"""
+
+TIMINGS: list[dict] = []
+# Samples of the running test, handed to its result record (see results.make_record)
+_pending: list[dict] = []
+_paused = 0
+
+
+def enabled(action: str) -> bool:
+    mode = os.environ.get("DEMOQA_PERF")
+    if mode == "0" or _paused:
+        return False
+    return mode == "all" or action in KEY_ACTIONS
+
+
+@contextmanager
+def paused():
+    """Nothing is measured inside (set-up clicks, e.g. resetting the checkbox tree)."""
+    global _paused
+    _paused += 1
+    try:
+        yield
+    finally:
+        _paused -= 1
+
+
+def _metrics(driver) -> dict[str, float]:
+    # Remote drivers have no CDP: only the settle time and long tasks are measured
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return {}
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        return {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+    except Exception:
+        return {}
+
+
+def _long_tasks(driver) -> list[float]:
+    try:
+        return driver.execute_script(JS_LONG_TASKS) or []
+    except Exception:
+        return []
+
+
+@contextmanager
+def measure(driver, action: str, **budget):
+    """Time the block as ``action`` (e.g. ``click_checkbox:Home``); ``budget`` overrides ``BUDGETS``."""
+    if not enabled(action):
+        yield {}
+        return
+    sample = {"action": action}
+    _long_tasks(driver)
+    before = _metrics(driver)
+    start = time.perf_counter()
+    yield sample
+    sample["settle_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    after = _metrics(driver)
+    for name, key in METRICS.items():
+        if name in before and name in after:
+            sample[key] = round((after[name] - before[name]) * 1000, 1)
+    tasks = _long_tasks(driver)
+    sample["long_tasks"] = len(tasks)
+    sample["long_task_ms"] = round(sum(tasks), 1)
+    limits = {**BUDGETS.get(action.split(":")[0], {}), **budget}
+    sample["breaches"] = [f"{key} {sample[key]:.0f} > {limit:.0f}"
+                          for key, limit in limits.items() if sample.get(key, 0) > limit]
+    TIMINGS.append(sample)
+    _pending.append(sample)
+
+
+def take() -> list[dict]:
+    """The samples measured since the last call (the current test's)."""
+    samples = _pending[:]
+    _pending.clear()
+    return samples
+
+
+def assert_within(action: str, **limits):
+    """Fail the test if the last ``action`` measured exceeded any of ``limits`` (ms).
+
+    The breaches are also added to the sample, so the test's record lists them.
+    """
+    samples = [s for s in _pending if s["action"] == action]
+    if not samples:
+        return
+    last = samples[-1]
+    over = [f"{key} {last.get(key, 0):.0f} > {limit:.0f}" for key, limit in limits.items() if last.get(key, 0) > limit]
+    last["breaches"] += [line for line in over if line not in last["breaches"]]
+    assert not over, f"{action} over budget: {', '.join(over)}"
+
+
+def print_timings(samples: list[dict] | None = None):
+    samples = TIMINGS if samples is None else samples
+    if not samples:
+        return
+    by_action = defaultdict(list)
+    for s in samples:
+        by_action[s["action"]].append(s)
+    print("\nFront-end timings (median ms: settle / layout / script / long tasks):")
+    for action, rows in sorted(by_action.items()):
+        medians = [statistics.median(r.get(key, 0) for r in rows)
+                   for key in ("settle_ms", "layout_ms", "script_ms", "long_task_ms")]
+        breaches = sum(1 for r in rows if r["breaches"])
+        extra = f", {breaches} over budget" if breaches else ""
+        print(f" - {action}: {len(rows)}x, " + " / ".join(f"{m:.0f}" for m in medians) + extra)
@@ -1,32 +1,28 @@
 import sys
+import time
 import os
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import drivers
+from results import ResultWriter, describe, make_record, summarize
+from locators import find, locator, print_stats
+from capture import clear_steps, note, on_failure, screenshot
+from perf import measure, print_timings
+from timeouts import until
+from waits import settled_text, wait_for_quiet, print_report
 
-URL = "https://demoqa.com/radio-button"
+# DEMOQA_BASE_URL switches the run to the local copies (see fixture_server.py)
+BASE_URL = os.environ.get("DEMOQA_BASE_URL", "https://demoqa.com").rstrip("/")
+URL = f"{BASE_URL}/radio-button"
 
 
 def make_driver(headless: bool = False):
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--window-size=1280,900")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    # Selenium Manager (Selenium >=4.6) resolves chromedriver automatically
-    drv = webdriver.Chrome(options=options)
-    drv.implicitly_wait(5)
-    return drv
+    # Shared factory: eager page load, ad hosts blocked (see drivers.py)
+    return drivers.make_driver(headless=headless)
 
 
 def open_page(driver):
-    driver.get(URL)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "custom-control")))
+    # Ready as soon as the form is there, not when every ad has loaded
+    drivers.open_page(driver, URL, locator("radiobox.option"), name="radiobox")
 
 
 def scroll_into_view(driver, el):
@@ -35,33 +31,31 @@ def scroll_into_view(driver, el):
 
 def label_for(driver, input_id: str):
     # Labels have css selector label[for="id"]
-    return driver.find_element(By.CSS_SELECTOR, f'label[for="{input_id}"]')
+    return find(driver, "radiobox.label", input_id=input_id)
 
 
 def input_by_id(driver, input_id: str):
-    return driver.find_element(By.ID, input_id)
+    return find(driver, "radiobox.input", input_id=input_id)
 
 
 def click_option(driver, input_id: str, screenshot_label: str | None = None):
     lbl = label_for(driver, input_id)
     scroll_into_view(driver, lbl)
-    WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, f'label[for="{input_id}"]')))
-    try:
-        lbl.click()
-    except Exception:
-        driver.execute_script("arguments[0].click();", lbl)
-    # Wait until selection state updates
-    WebDriverWait(driver, 5).until(lambda d: input_by_id(d, input_id).is_selected() or not input_by_id(d, input_id).is_enabled())
+    until(driver, "click_option", EC.element_to_be_clickable(lbl), 5)
+    with measure(driver, f"click_option:{input_id}"):
+        try:
+            lbl.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", lbl)
+        # Wait until selection state and result text stop changing
+        wait_for_quiet(driver, "click_option")
     if screenshot_label:
-        save_screenshot(driver, screenshot_label)
+        note(driver, screenshot_label)
 
 
 def get_result_text(driver) -> str:
-    try:
-        el = WebDriverWait(driver, 5).until(EC.visibility_of_element_located((By.CLASS_NAME, "text-success")))
-        return el.text.strip()
-    except Exception:
-        return ""
+    # No result after the click settled means there is none, no need to wait 5s for it
+    return settled_text(driver, locator("radiobox.result"), "get_result_text").strip()
 
 
 def is_selected(driver, input_id: str) -> bool:
@@ -73,16 +67,8 @@ def is_enabled(driver, input_id: str) -> bool:
 
 
 def save_screenshot(driver, label: str) -> str:
-    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    path = os.path.join(desktop, f"{label}_{ts}.png")
-    try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        driver.save_screenshot(path)
-        print(f"Saved screenshot: {path}")
-    except Exception as e:
-        print(f"Could not save screenshot: {e}")
-    return path
+    # Written in the background into the run's artifacts folder (see capture.py)
+    return screenshot(driver, label)
 
 
 def test_yes_selection_exclusive(driver):
@@ -110,32 +96,38 @@ def test_no_is_disabled(driver):
 
 
 def main():
-    failures = []
     driver = None
+    # One flushed line per finished test (see results.py), readable while the suite still runs
+    writer = ResultWriter()
     try:
         driver = make_driver(headless=False)
         for fn in (test_yes_selection_exclusive, test_impressive_selection_exclusive, test_no_is_disabled):
+            clear_steps()
+            writer.start("radiobox", fn.__name__)
+            start = time.perf_counter()
+            status, msg, artifacts = "PASS", "", []
             try:
                 fn(driver)
-                print(f"PASS: {fn.__name__}")
             except AssertionError as e:
-                print(f"FAIL: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, str(e)))
+                status, msg = "FAIL", str(e)
             except Exception as e:
-                print(f"ERROR: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, f"Unexpected: {e}"))
+                status, msg = "ERROR", f"Unexpected: {e}"
+            elapsed = time.perf_counter() - start
+            if status != "PASS":
+                artifacts.append(on_failure(driver, fn.__name__))
+            # Budget breaches of the test's key actions are printed and recorded with its result
+            record = make_record("radiobox", fn.__name__, status, elapsed, msg, artifacts)
+            print(describe(record))
+            writer.write(record)
     finally:
+        writer.close()
         if driver is not None:
             driver.quit()
 
-    if failures:
-        print("\nSummary: Some tests failed")
-        for name, msg in failures:
-            print(f" - {name}: {msg}")
-        sys.exit(1)
-    else:
-        print("\nSummary: All tests passed")
-        sys.exit(0)
+    print_report()
+    print_stats()
+    print_timings()
+    sys.exit(summarize(writer.records))
 
 
 if __name__ == "__main__":
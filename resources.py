@@ -0,0 +1,238 @@
+"""Process-tree resource readings for the browser under test (Linux /proc).
+
+Reads the driver's process tree (chromedriver plus every Chrome process it
+started) without extra dependencies. On systems without /proc the readings
+are empty and the callers simply report zeros.
+
+``watch`` puts a driver under a background sampler: RSS, CPU and open file
+descriptors of its tree every ``DEMOQA_RESOURCE_INTERVAL`` seconds (appended to
+``$DEMOQA_RESOURCE_LOG`` when set), and the peaks since the previous test are
+attached to each result record. Only the driver the running test uses is
+sampled (the last one watched, or the one passed to ``use``), so a worker
+holding several suites' browsers reports each test's own; ``unwatch`` (called
+by the factory's ``quit()``) drops a driver for good. ``should_recycle`` tells the runner when a
+driver has run too many tests or grown too big and must be replaced.
+"""
+import json
+import os
+import threading
+import time
+
+INTERVAL = float(os.environ.get("DEMOQA_RESOURCE_INTERVAL", "0.5"))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+MB = 1024 * 1024
+
+
+def driver_pid(driver) -> int | None:
+    """chromedriver's pid for a locally started driver, None for a remote one."""
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    return getattr(process, "pid", None)
+
+
+def children(pid: int) -> list[int]:
+    kids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                kids.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def process_tree(pid: int | None) -> list[int]:
+    if pid is None:
+        return []
+    tree, todo = [], [pid]
+    while todo:
+        current = todo.pop()
+        tree.append(current)
+        todo.extend(children(current))
+    return tree
+
+
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss(pid: int | None) -> int:
+    """Resident memory of the whole process tree rooted at ``pid``, in bytes."""
+    return sum(rss_bytes(p) for p in process_tree(pid))
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time used so far by ``pid``."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may hold spaces: fields are counted after its closing parenthesis
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def open_fds(pid: int) -> int:
+    try:
+        return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return 0
+
+
+def dir_size(path: str | None) -> int:
+    total = 0
+    for root, _, files in os.walk(path or ""):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def driver_roots(driver) -> list[int]:
+    """chromedriver plus, for a daemon browser (not its child), Chrome itself."""
+    return [pid for pid in (driver_pid(driver), getattr(driver, "browser_pid", None)) if pid is not None]
+
+
+class Monitor:
+    """Samples the process tree of the driver in use from a daemon thread."""
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.roots: dict[int, list[int]] = {}
+        # id() of the driver the running test uses, a key of ``roots``
+        self.current: int | None = None
+        self.lock = threading.Lock()
+        self.cpu_seen: dict[int, float] = {}
+        self.thread = None
+        self._reset()
+
+    def _reset(self):
+        self.peak_rss = self.peak_fds = 0
+        self.cpu = 0.0
+
+    def watch(self, driver):
+        with self.lock:
+            self.roots[id(driver)] = driver_roots(driver)
+            self.current = id(driver)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+            self.thread.start()
+
+    def use(self, driver):
+        """The next samples are ``driver``'s (None: the test runs without a browser)."""
+        with self.lock:
+            self.current = id(driver) if driver is not None and id(driver) in self.roots else None
+
+    def unwatch(self, driver):
+        with self.lock:
+            self.roots.pop(id(driver), None)
+            if self.current == id(driver):
+                self.current = None
+
+    def sample(self) -> dict:
+        with self.lock:
+            pids = [p for root in self.roots.get(self.current, []) for p in process_tree(root)]
+            rss = sum(rss_bytes(p) for p in pids)
+            fds = sum(open_fds(p) for p in pids)
+            cpu = 0.0
+            for pid in pids:
+                now = cpu_seconds(pid)
+                # Only what was used since the last sample; processes that are gone drop out
+                cpu += max(0.0, now - self.cpu_seen.get(pid, now))
+                self.cpu_seen[pid] = now
+            self.cpu_seen = {p: self.cpu_seen[p] for p in pids}
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_fds = max(self.peak_fds, fds)
+            self.cpu += cpu
+        return {"ts": round(time.time(), 3), "worker": os.getpid(), "rss_mb": round(rss / MB, 1),
+                "cpu_pct": round(100 * cpu / self.interval, 1), "fds": fds}
+
+    def _run(self):
+        log_path = os.environ.get("DEMOQA_RESOURCE_LOG")
+        while True:
+            time.sleep(self.interval)
+            if self.current is None:
+                continue
+            point = self.sample()
+            if log_path:
+                with open(log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(point) + "\n")
+
+    def take(self) -> dict:
+        """Peaks since the last call (the current test's), then start a new window."""
+        if self.current is None:
+            with self.lock:
+                self._reset()
+            return {}
+        self.sample()
+        with self.lock:
+            usage = {
+                "peak_rss_mb": round(self.peak_rss / MB, 1),
+                "cpu_s": round(self.cpu, 2),
+                "peak_fds": self.peak_fds,
+                "downloads_mb": round(dir_size(os.environ.get("DEMOQA_DOWNLOADS_DIR")) / MB, 1),
+            }
+            self._reset()
+        return usage
+
+
+MONITOR = Monitor()
+
+
+def watch(driver):
+    MONITOR.watch(driver)
+
+
+def use(driver):
+    MONITOR.use(driver)
+
+
+def unwatch(driver):
+    MONITOR.unwatch(driver)
+
+
+def take() -> dict:
+    return MONITOR.take()
+
+
+def should_recycle(driver, tests_run: int) -> str | None:
+    """Why ``driver`` should be replaced before its next test, or None.
+
+    ``DEMOQA_RECYCLE_TESTS`` (tests per driver) and ``DEMOQA_RECYCLE_MB`` (RSS of
+    its tree); 0 or unset disables either limit.
+    """
+    max_tests = int(os.environ.get("DEMOQA_RECYCLE_TESTS") or 0)
+    max_mb = float(os.environ.get("DEMOQA_RECYCLE_MB") or 0)
+    if max_tests and tests_run >= max_tests:
+        return f"{tests_run} tests run"
+    rss = sum(tree_rss(root) for root in driver_roots(driver))
+    if max_mb and rss > max_mb * MB:
+        return f"RSS {rss / MB:.0f} MB > {max_mb:.0f} MB"
+    return None
+
+
+def recycle(driver):
+    """Quit ``driver`` for good; a daemon browser is restarted rather than lent out again."""
+    driver.recycled = True
+    driver.quit()
+
+
+def print_peaks(records: list[dict]):
+    usage = [(r, r["resources"]) for r in records if r.get("resources")]
+    if not usage:
+        return
+    top, peak = max(usage, key=lambda u: u[1]["peak_rss_mb"])
+    print("\nBrowser resources per test:")
+    print(f" - peak RSS {peak['peak_rss_mb']:.0f} MB ({top['suite']}.{top['name']}), "
+          f"peak open files {max(u['peak_fds'] for _, u in usage)}, "
+          f"CPU {sum(u['cpu_s'] for _, u in usage):.1f}s in total, "
+          f"downloads up to {max(u['downloads_mb'] for _, u in usage):.1f} MB")
@@ -0,0 +1,206 @@
+"""Test results written as each test finishes, and the report built from them.
+
+Every record is one JSON line (suite, name, status, duration, message,
+artifacts, the front-end timings measured by perf.py and the browser's peak
+resource usage) appended and flushed as soon as the test ends, so a CI dashboard
+can follow a run live and a crash loses nothing already reported. A
+``RUNNING`` line is written when a test starts: if the run dies or hangs, the
+report shows which test never finished. ``junit.xml`` is rewritten (atomically)
+after each record, so it is valid at any point.
+
+    python results.py runs/20250101_120000            # summary + junit.xml from what is there
+    python results.py runs/ci/shard-*/results.jsonl   # several partial files at once
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+import perf
+import resources
+
+FILE_NAME = "results.jsonl"
+STATUSES = ("PASS", "FAIL", "ERROR", "RUNNING")
+
+
+def make_record(suite: str, name: str, status: str, duration: float = 0.0, message: str = "",
+                artifacts: list[str] | None = None) -> dict:
+    return {
+        "suite": suite,
+        "name": name,
+        "status": status,
+        "duration": round(duration, 3),
+        "message": message,
+        "artifacts": list(artifacts or []),
+        # The timings measured during the test, made in the same process right after it
+        "perf": perf.take() if status != "RUNNING" else [],
+        # Peak RSS, CPU and open files of the browser while the test ran (see resources.py)
+        "resources": resources.take() if status != "RUNNING" else {},
+        "ts": round(time.time(), 3),
+    }
+
+
+def default_path() -> str:
+    """``$DEMOQA_RESULTS``, else results.jsonl in the run's artifacts folder."""
+    from capture import artifacts_dir
+
+    return os.environ.get("DEMOQA_RESULTS") or os.path.join(artifacts_dir(), FILE_NAME)
+
+
+class ResultWriter:
+    """Appends one flushed JSON line per record and keeps junit.xml next to it up to date."""
+
+    def __init__(self, path: str | None = None, junit: bool = True):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.junit_path = os.path.join(os.path.dirname(os.path.abspath(self.path)), "junit.xml") if junit else None
+        self.records: list[dict] = []
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def start(self, suite: str, name: str):
+        self._append(make_record(suite, name, "RUNNING"))
+
+    def write(self, record: dict):
+        self._append(record)
+        self.records.append(record)
+        if self.junit_path:
+            write_junit(consolidate(self.records), self.junit_path)
+
+    def _append(self, record: dict):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load(path: str) -> list[dict]:
+    records = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Last line cut short by a crash
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def find_files(paths: list[str]) -> list[str]:
+    """Result files under the given files/run folders (shard and worker subfolders included)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "**", FILE_NAME), recursive=True)))
+        else:
+            found.append(path)
+    return found
+
+
+def consolidate(records: list[dict]) -> list[dict]:
+    """Latest record per test, a leftover RUNNING becoming an ERROR."""
+    latest = {}
+    for record in records:
+        latest[(record["suite"], record["name"])] = record
+    merged = []
+    for record in latest.values():
+        if record["status"] == "RUNNING":
+            record = dict(record, status="ERROR", message="Unexpected: did not finish (crash or hang)")
+        merged.append(record)
+    return merged
+
+
+def write_junit(records: list[dict], path: str):
+    by_suite: dict[str, list[dict]] = {}
+    for record in records:
+        by_suite.setdefault(record["suite"], []).append(record)
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', "<testsuites>"]
+    for suite, cases in by_suite.items():
+        failures = sum(r["status"] == "FAIL" for r in cases)
+        errors = sum(r["status"] == "ERROR" for r in cases)
+        duration = sum(r["duration"] for r in cases)
+        lines.append(f'  <testsuite name={quoteattr(suite)} tests="{len(cases)}" failures="{failures}" '
+                     f'errors="{errors}" time="{duration:.3f}">')
+        for r in cases:
+            lines.append(f'    <testcase classname={quoteattr(suite)} name={quoteattr(r["name"])} time="{r["duration"]:.3f}">')
+            if r["status"] in ("FAIL", "ERROR"):
+                tag = "failure" if r["status"] == "FAIL" else "error"
+                lines.append(f"      <{tag} message={quoteattr(r['message'])}/>")
+            out = r.get("artifacts", []) + [f"over budget: {line}" for line in breaches(r)]
+            if out:
+                text = escape("\n".join(out))
+                lines.append(f"      <system-out>{text}</system-out>")
+            lines.append("    </testcase>")
+        lines.append("  </testsuite>")
+    lines.append("</testsuites>")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+def breaches(record: dict) -> list[str]:
+    return [f"{s['action']} {', '.join(s['breaches'])}" for s in record.get("perf", []) if s.get("breaches")]
+
+
+def describe(record: dict) -> str:
+    """``STATUS: suite.name -> message``, with the test's budget breaches next to it."""
+    line = f"{record['status']}: {record['suite']}.{record['name']}"
+    if record["message"]:
+        line += f" -> {record['message']}"
+    over = breaches(record)
+    if over:
+        line += f" (over budget: {'; '.join(over)})"
+    return line
+
+
+def summarize(records: list[dict]) -> int:
+    """Print the tests that failed or ran over budget; 1 if any did not pass."""
+    over = [r for r in records if r["status"] == "PASS" and breaches(r)]
+    if over:
+        print("\nPassed over budget (front-end timings, see perf.py):")
+        for r in over:
+            print(f" - {describe(r)}")
+    failures = [r for r in records if r["status"] != "PASS"]
+    if failures:
+        print("\nSummary: Some tests failed")
+        for r in failures:
+            print(f" - {describe(r)}")
+        return 1
+    print("\nSummary: All tests passed")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consolidate results.jsonl files into one report.")
+    parser.add_argument("paths", nargs="+", help="run folders or results.jsonl files")
+    parser.add_argument("--junit", help="where to write the merged junit.xml (default: next to the first file)")
+    args = parser.parse_args(argv)
+    files = find_files(args.paths)
+    records = consolidate([r for path in files for r in load(path)])
+    if not files or not records:
+        print("No results found")
+        sys.exit(1)
+    junit = args.junit or os.path.join(os.path.dirname(os.path.abspath(files[0])), "junit.xml")
+    write_junit(records, junit)
+    counts = {s: sum(r["status"] == s for r in records) for s in STATUSES[:3]}
+    print(f"{len(records)} tests from {len(files)} files: " + ", ".join(f"{n} {s}" for s, n in counts.items())
+          + f" (JUnit: {junit})")
+    sys.exit(summarize(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Parallel runner for the four demoqa suites.
+
+Collects the ``test_*`` functions of textbox, radiobox, upload and chekbox and
+spreads them over worker processes, each with its own headless Chrome:
+
+    python runner.py --workers 4
+    python runner.py --suite textbox -k email
+    python runner.py --local            # offline, against fixture_server.py
+    python runner.py --shard 2/3 --remote http://grid:4444   # one machine's share
+    python runner.py --incremental      # skip tests that passed with the same code and page
+"""
+import argparse
+import importlib
+import inspect
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+
+import capture
+import drivers
+import durations
+import fixture_server
+import incremental
+import instrumentation
+import locators
+import perf
+import resources
+import results
+import timeouts
+import waits
+
+SUITES = ("textbox", "radiobox", "upload", "chekbox")
+
+
+def collect(suites=SUITES, keyword: str | None = None) -> list[tuple[str, str]]:
+    tests = []
+    for mod_name in suites:
+        mod = importlib.import_module(mod_name)
+        for name, obj in vars(mod).items():
+            if not (name.startswith("test_") and inspect.isfunction(obj) and obj.__module__ == mod.__name__):
+                continue
+            if keyword and keyword not in f"{mod_name}.{name}":
+                continue
+            tests.append((mod_name, name))
+    return tests
+
+
+def takes_driver(fn) -> bool:
+    # chekbox tests take an optional driver and reset the tree themselves before running
+    return "driver" in inspect.signature(fn).parameters
+
+
+def run_one(mod_name: str, name: str, by_suite: dict, headless: bool) -> tuple[str, str, list[str]]:
+    mod = importlib.import_module(mod_name)
+    fn = getattr(mod, name)
+    capture.clear_steps()
+    # This test's resource peaks are those of its suite's browser only
+    resources.use(by_suite.get(mod_name))
+    try:
+        if takes_driver(fn):
+            if mod_name not in by_suite:
+                by_suite[mod_name] = mod.make_driver(headless=headless)
+            fn(by_suite[mod_name])
+        else:
+            fn()
+        return "PASS", "", []
+    except AssertionError as e:
+        status, msg, artifacts = "FAIL", str(e), list(getattr(e, "artifacts", []))
+    except Exception as e:
+        status, msg, artifacts = "ERROR", f"Unexpected: {e}", list(getattr(e, "artifacts", []))
+    # Suites that capture their own failures (chekbox) hand the paths over on the exception
+    if not artifacts and by_suite.get(mod_name) is not None:
+        try:
+            artifacts.append(capture.on_failure(by_suite[mod_name], name))
+        except Exception:
+            pass
+    return status, msg, artifacts
+
+
+def worker(index: int, run_dir: str, headless: bool, tasks, outcomes, profile: bool = False):
+    worker_dir = os.path.join(run_dir, f"worker-{index}")
+    # Downloads are bound to the driver, screenshots are re-pointed for every test
+    os.environ["DEMOQA_DOWNLOADS_DIR"] = os.path.join(worker_dir, "downloads")
+    os.environ["DEMOQA_WAIT_LOG"] = os.path.join(run_dir, "waits.jsonl")
+    os.environ["DEMOQA_RESOURCE_LOG"] = os.path.join(run_dir, "resources.jsonl")
+    if profile:
+        os.environ[instrumentation.SAMPLES_ENV] = os.path.join(run_dir, "profile")
+    if headless:
+        os.environ["DEMOQA_HEADLESS"] = "1"
+    by_suite = {}
+    # Tests run by each driver so far, for recycling
+    uses = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            mod_name, name = task
+            os.environ["DEMOQA_ARTIFACTS_DIR"] = os.path.join(worker_dir, f"{mod_name}.{name}")
+            # Reported before running, so a test that hangs or kills the worker is still visible
+            outcomes.put(results.make_record(mod_name, name, "RUNNING"))
+            start = time.perf_counter()
+            status, msg, artifacts = run_one(mod_name, name, by_suite, headless)
+            outcomes.put(results.make_record(mod_name, name, status, time.perf_counter() - start, msg, artifacts))
+            if by_suite.get(mod_name) is not None:
+                uses[mod_name] = uses.get(mod_name, 0) + 1
+                reason = resources.should_recycle(by_suite[mod_name], uses[mod_name])
+                if reason:
+                    # The next test of this suite starts a fresh browser
+                    print(f"Worker {index}: recycling the {mod_name} driver ({reason})")
+                    try:
+                        resources.recycle(by_suite.pop(mod_name))
+                    except Exception:
+                        pass
+                    uses[mod_name] = 0
+    finally:
+        capture.flush()
+        # Spawned workers skip atexit hooks
+        instrumentation.dump()
+        locators.dump(os.path.join(run_dir, "locators", f"worker-{index}.json"))
+        for drv in by_suite.values():
+            try:
+                drv.quit()
+            except Exception:
+                pass
+
+
+def run_parallel(tests, workers: int, run_dir: str, headless: bool = True, profile: bool = False,
+                 writer: results.ResultWriter | None = None, first=()) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    tasks, outcomes = ctx.Queue(), ctx.Queue()
+    # Keep tests of the same suite together so a worker rarely needs a second driver,
+    # after the ``first`` ones (the last failures in incremental mode)
+    order = {suite: i for i, suite in enumerate(SUITES)}
+    for task in sorted(tests, key=lambda t: (t not in first, order.get(t[0], len(SUITES)))):
+        tasks.put(task)
+    procs = [ctx.Process(target=worker, args=(i, run_dir, headless, tasks, outcomes, profile)) for i in range(workers)]
+    for p in procs:
+        tasks.put(None)
+        p.start()
+
+    done = []
+    while len(done) < len(tests):
+        try:
+            record = outcomes.get(timeout=1)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                break
+            continue
+        if record["status"] == "RUNNING":
+            if writer:
+                writer.start(record["suite"], record["name"])
+            continue
+        print(results.describe(record))
+        if writer:
+            writer.write(record)
+        done.append(record)
+    for p in procs:
+        p.join()
+
+    # A worker that died mid-test never reports it
+    finished = {(r["suite"], r["name"]) for r in done}
+    for mod_name, name in tests:
+        if (mod_name, name) not in finished:
+            record = results.make_record(mod_name, name, "ERROR", message="Unexpected: worker exited before reporting")
+            print(f"ERROR: {mod_name}.{name} -> {record['message']}")
+            if writer:
+                writer.write(record)
+            done.append(record)
+    return done
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the demoqa suites in parallel.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--suite", action="append", choices=SUITES, help="limit to one suite (repeatable)")
+    parser.add_argument("-k", dest="keyword", help="only run tests whose module.name contains this")
+    parser.add_argument("--headed", action="store_true", help="show the browsers instead of headless")
+    parser.add_argument("--run-dir", help="where screenshots and downloads go (default: runs/<timestamp>)")
+    parser.add_argument("--driver-profile", choices=drivers.PROFILES,
+                        help="Chrome profile: fast (eager load, ads blocked) or default (full page load)")
+    parser.add_argument("--net-cache", action="store_true",
+                        help="serve page assets from the record-and-replay cache (netcache.py)")
+    parser.add_argument("--profile", action="store_true", help="time every WebDriver command and wait (profile.json)")
+    parser.add_argument("--shard", type=durations.parse_shard, metavar="I/N",
+                        help="only run shard I of N, balanced by recorded test durations")
+    parser.add_argument("--recycle-after", type=int, default=25, metavar="N",
+                        help="replace a worker's driver after N tests (0: never)")
+    parser.add_argument("--recycle-mb", type=float, default=1500, metavar="MB",
+                        help="replace a driver whose process tree grew past MB of RSS (0: never)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip tests that passed with the same code and page fingerprints (incremental.py)")
+    parser.add_argument("--force", action="store_true", help="with --incremental: run everything, refresh the cache")
+    parser.add_argument("--remote", metavar="URL", help="WebDriver endpoint to run the browsers on (grid, chromedriver)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--local", action="store_true", help="serve the pages from fixture_server.py")
+    target.add_argument("--base-url", help="site to test (default: $DEMOQA_BASE_URL or https://demoqa.com)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    if args.local:
+        server, args.base_url = fixture_server.start()
+    if args.driver_profile:
+        os.environ["DEMOQA_DRIVER_PROFILE"] = args.driver_profile
+    if args.net_cache:
+        os.environ["DEMOQA_NETCACHE"] = "1"
+    if args.remote:
+        os.environ["DEMOQA_REMOTE_URL"] = args.remote
+    # Inherited by the spawned workers, like the settings above
+    os.environ["DEMOQA_RECYCLE_TESTS"] = str(args.recycle_after)
+    os.environ["DEMOQA_RECYCLE_MB"] = str(args.recycle_mb)
+    if args.base_url:
+        # Set before the suites are imported here and inherited by the spawned workers
+        os.environ["DEMOQA_BASE_URL"] = args.base_url
+    tests = collect(tuple(args.suite or SUITES), args.keyword)
+    if args.shard:
+        tests = durations.select(tests, *args.shard)
+    run_dir = os.path.abspath(args.run_dir or os.path.join("runs", datetime.now().strftime('%Y%m%d_%H%M%S')))
+    os.makedirs(run_dir, exist_ok=True)
+    prints, first = {}, set()
+    if args.incremental:
+        to_run, skipped, prints = incremental.plan(tests, args.force)
+        incremental.print_plan(to_run, skipped)
+        incremental.write_plan(to_run, skipped, os.path.join(run_dir, "incremental.json"))
+        first = incremental.failures(tests)
+        tests = [test for test, _ in to_run]
+    workers = max(1, min(args.workers, len(tests)))
+    shard = f" (shard {args.shard[0]}/{args.shard[1]})" if args.shard else ""
+    print(f"Running {len(tests)} tests{shard} on {workers} workers (artifacts: {run_dir})")
+    # Streamed as tests finish: run_dir/results.jsonl and junit.xml
+    writer = results.ResultWriter(os.path.join(run_dir, results.FILE_NAME))
+    try:
+        records = run_parallel(tests, workers, run_dir, headless=not args.headed, profile=args.profile,
+                               writer=writer, first=first) if tests else []
+    finally:
+        writer.close()
+        if server is not None:
+            fixture_server.stop(server)
+    # Shards run side by side; shard.py folds their durations in once they are merged
+    if not args.shard:
+        durations.update(records)
+    if args.incremental:
+        # Shards of one run share the file: a lost update only means a test runs again next time
+        incremental.update(records, prints)
+    waits.print_report(waits.load_log(os.path.join(run_dir, "waits.jsonl")))
+    locators.print_stats(locators.load_stats(os.path.join(run_dir, "locators")))
+    timeouts.print_drift()
+    perf.print_timings([sample for r in records for sample in r.get("perf", [])])
+    resources.print_peaks(records)
+    if args.profile:
+        instrumentation.write_report(instrumentation.load_samples(os.path.join(run_dir, "profile")),
+                                     os.path.join(run_dir, "profile.json"))
+    sys.exit(results.summarize(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Split the suites into N shards balanced by duration and merge their results.
+
+Each shard is an ordinary ``runner.py --shard I/N`` run, so on real machines
+every box runs its own share against its own WebDriver endpoint and
+``shard.py --merge`` combines the ``results.jsonl`` files afterwards. Locally
+this script plays all the parts: it starts one runner per shard, each pointed
+at an endpoint (``--endpoint`` repeated, or ``--local-grid`` to start a
+chromedriver per shard as a stand-in for a grid), and prints one summary with
+the same exit code as the suites' ``main()``.
+
+    python shard.py --shards 3 --local-grid -- --local
+    python shard.py --shards 2 --endpoint http://grid-a:4444 --endpoint http://grid-b:4444
+    python shard.py --merge runs/ci/shard-*/results.jsonl
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.request import urlopen
+
+import durations
+import results
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_chromedriver(timeout: float = 20.0) -> tuple[subprocess.Popen, str]:
+    """A bare chromedriver speaks the same WebDriver protocol as a grid node."""
+    path = os.environ.get("DEMOQA_CHROMEDRIVER") or shutil.which("chromedriver")
+    if not path:
+        raise RuntimeError("chromedriver not found; set DEMOQA_CHROMEDRIVER or pass --endpoint")
+    port = free_port()
+    proc = subprocess.Popen([path, f"--port={port}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urlopen(f"{url}/status", timeout=1).close()
+            return proc, url
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"chromedriver did not answer on {url}")
+
+
+def run_shards(total: int, endpoints: list[str | None], run_dir: str,
+               runner_args: list[str]) -> tuple[list[str], list[int]]:
+    """Run every shard side by side; returns their results.jsonl paths and exit codes."""
+    procs = []
+    start = time.perf_counter()
+    for index in range(1, total + 1):
+        shard_dir = os.path.join(run_dir, f"shard-{index}")
+        os.makedirs(shard_dir, exist_ok=True)
+        cmd = [sys.executable, os.path.join(HERE, "runner.py"), "--shard", f"{index}/{total}", "--run-dir", shard_dir]
+        endpoint = endpoints[(index - 1) % len(endpoints)] if endpoints else None
+        if endpoint:
+            cmd += ["--remote", endpoint]
+        log = open(os.path.join(shard_dir, "output.log"), "w", encoding="utf-8")
+        procs.append((index, endpoint, shard_dir, log, subprocess.Popen(cmd + runner_args, stdout=log, stderr=subprocess.STDOUT)))
+    for index, endpoint, shard_dir, log, proc in procs:
+        proc.wait()
+        log.close()
+        # Finishing times close together mean the durations balanced the shards well
+        print(f"Shard {index}/{total} on {endpoint or 'local Chrome'}: exit {proc.returncode} after "
+              f"{time.perf_counter() - start:.1f}s ({os.path.join(shard_dir, 'output.log')})")
+    return ([os.path.join(shard_dir, results.FILE_NAME) for _, _, shard_dir, _, _ in procs],
+            [proc.returncode for _, _, _, _, proc in procs])
+
+
+def merge(paths: list[str], exit_codes: list[int] | None = None) -> list[dict]:
+    records = []
+    for i, path in enumerate(paths):
+        found = results.load(path)
+        crashed = not os.path.exists(path) or bool(exit_codes and exit_codes[i] != 0)
+        # An empty file from a shard that exited 0 had no tests to run (--suite, --incremental)
+        if not found and crashed:
+            # A shard that crashed before reporting anything still has to fail the run
+            found = [results.make_record("shard", os.path.basename(os.path.dirname(path)) or path, "ERROR",
+                                         message="Unexpected: no results")]
+        records.extend(found)
+    # Tests left RUNNING by a crashed shard become errors here
+    return results.consolidate(records)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Everything after "--" goes to each runner (e.g. --local, --suite textbox, --workers 2)
+    runner_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    own_args = argv[:argv.index("--")] if "--" in argv else argv
+    parser = argparse.ArgumentParser(description="Run the suites as duration-balanced shards.")
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--endpoint", action="append", default=[], help="remote WebDriver URL (repeatable)")
+    parser.add_argument("--local-grid", action="store_true", help="start one chromedriver per shard as endpoints")
+    parser.add_argument("--run-dir", help="default: runs/<timestamp>")
+    parser.add_argument("--merge", nargs="+", metavar="RESULTS", help="only merge existing results.jsonl files")
+    args = parser.parse_args(own_args)
+
+    if args.merge:
+        records = merge(args.merge)
+    else:
+        run_dir = os.path.abspath(args.run_dir or os.path.join("runs", datetime.now().strftime('%Y%m%d_%H%M%S')))
+        grid = [start_chromedriver() for _ in range(args.shards)] if args.local_grid else []
+        endpoints = [url for _, url in grid] or args.endpoint
+        print(f"Running {args.shards} shards (artifacts: {run_dir})")
+        try:
+            records = merge(*run_shards(args.shards, endpoints, run_dir, runner_args))
+        finally:
+            for proc, _ in grid:
+                proc.terminate()
+    durations.update(records)
+    print(f"\nMerged {len(records)} results")
+    sys.exit(results.summarize(records))
+
+
+if __name__ == "__main__":
+    main()
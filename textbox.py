@@ -1,91 +1,123 @@
 import sys
 import time
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from datetime import datetime
+import drivers
+from results import ResultWriter, describe, make_record, summarize
+from locators import find, locator, print_stats
+from capture import clear_steps, note, on_failure, screenshot
+from perf import measure, print_timings
+from timeouts import until
+from waits import assert_text_absent, settled_text, wait_for_quiet, print_report
 
-URL = "https://demoqa.com/text-box"
+# DEMOQA_BASE_URL switches the run to the local copies (see fixture_server.py)
+BASE_URL = os.environ.get("DEMOQA_BASE_URL", "https://demoqa.com").rstrip("/")
+URL = f"{BASE_URL}/text-box"
 
 
 def make_driver(headless: bool = False):
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--window-size=1280,900")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    # Selenium Manager (built into Selenium 4.6+) will resolve the driver automatically
-    drv = webdriver.Chrome(options=options)
-    drv.implicitly_wait(5)
-    return drv
+    # Shared factory: eager page load, ad hosts blocked (see drivers.py)
+    return drivers.make_driver(headless=headless)
 
 
 def open_page(driver):
-    driver.get(URL)
+    # Ready as soon as the form is there, not when every ad has loaded
+    drivers.open_page(driver, URL, locator("textbox.user_name"), name="textbox")
 
 
 def fill_common_fields(driver, name="Mohamed Test", current="Addr 1", permanent="Addr 2"):
-    driver.find_element(By.ID, "userName").clear()
-    driver.find_element(By.ID, "userName").send_keys(name)
-    driver.find_element(By.ID, "currentAddress").clear()
-    driver.find_element(By.ID, "currentAddress").send_keys(current)
-    driver.find_element(By.ID, "permanentAddress").clear()
-    driver.find_element(By.ID, "permanentAddress").send_keys(permanent)
+    for field, value in (("textbox.user_name", name), ("textbox.current_address", current),
+                         ("textbox.permanent_address", permanent)):
+        el = find(driver, field)
+        el.clear()
+        el.send_keys(value)
 
 
 def set_email(driver, value: str):
-    el = driver.find_element(By.ID, "userEmail")
+    el = find(driver, "textbox.email")
     el.clear()
     if value is not None:
         el.send_keys(value)
     return el
 
 
+# Sets every field in one round trip. React keeps its own copy of each input value, so the
+# value goes through the native setter and an input event is dispatched for it to register.
+JS_FILL_FORM = """
+const [values, submit] = arguments;
+const setters = {
+    INPUT: Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set,
+    TEXTAREA: Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set,
+};
+for (const [id, value] of Object.entries(values)) {
+    const el = document.getElementById(id);
+    if (!el) throw new Error('Field not found: ' + id);
+    setters[el.tagName].call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+if (submit) {
+    const btn = document.getElementById('submit');
+    btn.scrollIntoView({block: 'center'});
+    btn.click();
+}
+return document.getElementById('userEmail');
+"""
+
+
+def fill_form(driver, email: str | None = None, name="Mohamed Test", current="Addr 1", permanent="Addr 2",
+              submit_form: bool = False, label: str | None = None, typing: bool = False):
+    """Fill the whole form (and optionally submit it) in a single execute_script.
+
+    Pass ``typing=True`` to go through real keystrokes (``send_keys``) instead.
+    Returns the email input element.
+    """
+    if typing:
+        fill_common_fields(driver, name, current, permanent)
+        email_input = set_email(driver, email or "")
+        if submit_form:
+            submit(driver, label)
+        return email_input
+    values = {"userName": name, "userEmail": email or "", "currentAddress": current, "permanentAddress": permanent}
+    if not submit_form:
+        return driver.execute_script(JS_FILL_FORM, values, False)
+    with measure(driver, "submit"):
+        email_input = driver.execute_script(JS_FILL_FORM, values, True)
+        settle_after_submit(driver, label)
+    return email_input
+
+
 def submit(driver, label: str | None = None):
-    btn = driver.find_element(By.ID, "submit")
+    btn = find(driver, "textbox.submit")
     # Scroll into view to avoid footer overlay
     driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", btn)
+    with measure(driver, "submit"):
+        try:
+            until(driver, "submit", EC.element_to_be_clickable(btn), 5)
+            btn.click()
+        except Exception:
+            # Fallback to JS click if intercepted
+            driver.execute_script("arguments[0].click();", btn)
+        settle_after_submit(driver, label)
+
+
+def settle_after_submit(driver, label: str | None = None):
+    # Wait for the form to settle (output rendered or field flagged), then capture screenshot if requested
     try:
-        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.ID, "submit")))
-        btn.click()
-    except Exception:
-        # Fallback to JS click if intercepted
-        driver.execute_script("arguments[0].click();", btn)
-    # Wait for results to show, then capture screenshot if requested
-    try:
-        WebDriverWait(driver, 5).until(EC.visibility_of_element_located((By.ID, "output")))
+        wait_for_quiet(driver, "submit")
     finally:
         if label:
-            save_screenshot(driver, label)
+            note(driver, label)
 
 
 def get_output_text(driver) -> str:
-    try:
-        el = WebDriverWait(driver, 5).until(
-            EC.visibility_of_element_located((By.ID, "output"))
-        )
-        return el.text
-    except Exception:
-        return ""
+    # Read once the form has settled: an absent output returns "" at once, not after 5s
+    return settled_text(driver, locator("textbox.output"), "get_output_text")
 
 
 def save_screenshot(driver, label: str) -> str:
-    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    path = os.path.join(desktop, f"{label}_{ts}.png")
-    try:
-        # Ensure directory exists (Desktop should exist, but guard anyway)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        driver.save_screenshot(path)
-        print(f"Saved screenshot: {path}")
-    except Exception as e:
-        print(f"Could not save screenshot: {e}")
-    return path
+    # Written in the background into the run's artifacts folder (see capture.py)
+    return screenshot(driver, label)
 
 
 def has_error_class(element) -> bool:
@@ -96,9 +128,8 @@ def has_error_class(element) -> bool:
 def test_valid_email(driver):
     email = "mohamed.cherif02@esprit.tn"
     open_page(driver)
-    fill_common_fields(driver)
-    email_input = set_email(driver, email)
-    submit(driver, label="valid_email_after_submit")
+    # Real keystrokes on the happy path; the other cases use the one-round-trip bulk fill
+    email_input = fill_form(driver, email=email, submit_form=True, label="valid_email_after_submit", typing=True)
 
     assert not has_error_class(email_input), "Valid email should not have 'field-error'."
     out = get_output_text(driver)
@@ -107,66 +138,64 @@ def test_valid_email(driver):
 
 def test_empty_email(driver):
     open_page(driver)
-    fill_common_fields(driver)
-    email_input = set_email(driver, "")
-    submit(driver, label="empty_email_after_submit")
+    email_input = fill_form(driver, email="", submit_form=True, label="empty_email_after_submit")
 
     assert not has_error_class(email_input), "Empty email should not be marked as error."
-    out = get_output_text(driver)
-    assert "Email:" not in out, "Email line should be absent for empty email."
+    assert_text_absent(driver, locator("textbox.output"), "Email:", "Email line should be absent for empty email.")
 
 
 def test_invalid_email(driver):
     bad_email = "mohamed.cherifesprit.tn"
     open_page(driver)
-    fill_common_fields(driver)
-    email_input = set_email(driver, bad_email)
-    submit(driver, label="invalid_email_after_submit")
+    email_input = fill_form(driver, email=bad_email, submit_form=True, label="invalid_email_after_submit")
 
     assert has_error_class(email_input), "Invalid email should have 'field-error'."
-    out = get_output_text(driver)
-    assert "Email:" not in out, "Email line should not be present for invalid email."
+    assert_text_absent(driver, locator("textbox.output"), "Email:", "Email line should not be present for invalid email.")
 
 
 def test_invalid_email_missing_domain(driver):
     bad_email = "mohamed.cherif02@"
     open_page(driver)
-    fill_common_fields(driver)
-    email_input = set_email(driver, bad_email)
-    submit(driver, label="invalid_email_missing_domain_after_submit")
+    email_input = fill_form(driver, email=bad_email, submit_form=True, label="invalid_email_missing_domain_after_submit")
 
     assert has_error_class(email_input), "Invalid email (missing domain) should have 'field-error'."
-    out = get_output_text(driver)
-    assert "Email:" not in out, "Email line should not be present for invalid email (missing domain)."
+    assert_text_absent(driver, locator("textbox.output"), "Email:",
+                       "Email line should not be present for invalid email (missing domain).")
 
 
 def main():
-    failures = []
     driver = None
+    # One flushed line per finished test (see results.py), readable while the suite still runs
+    writer = ResultWriter()
     try:
         driver = make_driver(headless=False)
         for fn in (test_valid_email, test_empty_email, test_invalid_email, test_invalid_email_missing_domain):
+            clear_steps()
+            writer.start("textbox", fn.__name__)
+            start = time.perf_counter()
+            status, msg, artifacts = "PASS", "", []
             try:
                 fn(driver)
-                print(f"PASS: {fn.__name__}")
             except AssertionError as e:
-                print(f"FAIL: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, str(e)))
+                status, msg = "FAIL", str(e)
             except Exception as e:
-                print(f"ERROR: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, f"Unexpected: {e}"))
+                status, msg = "ERROR", f"Unexpected: {e}"
+            elapsed = time.perf_counter() - start
+            if status != "PASS":
+                artifacts.append(on_failure(driver, fn.__name__))
+            # Budget breaches of the test's key actions are printed and recorded with its result
+            record = make_record("textbox", fn.__name__, status, elapsed, msg, artifacts)
+            print(describe(record))
+            writer.write(record)
     finally:
+        writer.close()
         if driver is not None:
             driver.quit()
 
-    if failures:
-        print("\nSummary: Some tests failed")
-        for name, msg in failures:
-            print(f" - {name}: {msg}")
-        sys.exit(1)
-    else:
-        print("\nSummary: All tests passed")
-        sys.exit(0)
+    print_report()
+    print_stats()
+    print_timings()
+    sys.exit(summarize(writer.records))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""Timeouts learned from how long each named wait has actually taken.
+
+Every wait that goes through ``until``/``observe`` appends its duration to a
+shared history (``.wait_history.jsonl``, one line per sample, safe for the
+runner's workers to append to), trimmed to the last ``WINDOW`` samples of
+each wait whenever it is loaded. Once a wait has ``MIN_SAMPLES`` successes its
+timeout becomes ``p99 * SAFETY_FACTOR``, never above the hard-coded value it
+replaces and never below ``FLOOR``: a regression fails in seconds instead of
+after the full 10 or 25 s. ``DEMOQA_ADAPTIVE_TIMEOUTS=0`` keeps the fixed
+values (the history is still recorded).
+
+    python timeouts.py            # learned timeouts and waits drifting slower
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from waits import no_implicit_wait
+
+HISTORY = os.environ.get("DEMOQA_TIMEOUT_HISTORY") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".wait_history.jsonl")
+# Samples kept per wait; older ones no longer say much about the site
+WINDOW = 200
+MIN_SAMPLES = 10
+SAFETY_FACTOR = 3.0
+FLOOR = 1.0
+# Drift: median of the last DRIFT_WINDOW samples vs the DRIFT_WINDOW before them
+DRIFT_WINDOW = 20
+DRIFT_RATIO = 1.25
+
+_history: dict[str, list[float]] | None = None
+
+
+def adaptive() -> bool:
+    return os.environ.get("DEMOQA_ADAPTIVE_TIMEOUTS", "1") != "0"
+
+
+def load_history(path: str = HISTORY) -> dict[str, list[float]]:
+    """Successful durations per wait name, oldest first, ``WINDOW`` at most.
+
+    The file is compacted on the way: it keeps the last ``WINDOW`` entries of
+    each wait, so it stays as small as what is learned from it.
+    """
+    entries = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A worker killed mid-write leaves a partial last line
+                    continue
+    except FileNotFoundError:
+        return {}
+    # The last WINDOW entries of each wait, in file order
+    per_name = defaultdict(list)
+    for index, entry in enumerate(entries):
+        per_name[entry["name"]].append(index)
+    kept = sorted(index for indexes in per_name.values() for index in indexes[-WINDOW:])
+    if len(kept) < len(entries):
+        entries = [entries[index] for index in kept]
+        _compact(path, entries)
+    history = defaultdict(list)
+    for entry in entries:
+        if entry.get("ok"):
+            history[entry["name"]].append(entry["seconds"])
+    return dict(history)
+
+
+def _compact(path: str, entries: list[dict]):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        # Atomic: a worker appending meanwhile loses at most that one sample
+        os.replace(tmp, path)
+    except OSError:
+        # A read-only checkout still learns from the history, it just is not trimmed
+        pass
+
+
+def _samples(name: str) -> list[float]:
+    global _history
+    if _history is None:
+        _history = load_history()
+    return _history.setdefault(name, [])
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def learned(values: list[float], default: float) -> float:
+    if len(values) < MIN_SAMPLES:
+        return default
+    return min(default, max(FLOOR, percentile(values, 99) * SAFETY_FACTOR))
+
+
+def timeout_for(name: str, default: float) -> float:
+    """Timeout for the wait ``name``: learned from its history, ``default`` until there is enough."""
+    return learned(_samples(name), default) if adaptive() else default
+
+
+def observe(name: str, seconds: float, ok: bool = True, path: str = HISTORY):
+    """Add one duration to the history (timeouts are kept but not learned from)."""
+    if ok:
+        samples = _samples(name)
+        samples.append(seconds)
+        del samples[:-WINDOW]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"name": name, "seconds": round(seconds, 4), "ok": ok, "ts": round(time.time())}) + "\n")
+
+
+def until(driver, name: str, condition, default: float, poll_frequency: float = 0.5):
+    """``WebDriverWait(driver, timeout_for(name, default)).until(condition)``, recorded in the history.
+
+    The implicit wait is off meanwhile: a missing element fails one poll at
+    once instead of stalling it, so ``timeout`` really bounds the wait.
+    """
+    timeout = timeout_for(name, default)
+    start = time.perf_counter()
+    try:
+        with no_implicit_wait(driver):
+            result = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition)
+    except TimeoutException as e:
+        observe(name, time.perf_counter() - start, ok=False)
+        learned_note = f" (learned timeout, fixed value {default:.0f}s)" if timeout < default else ""
+        raise TimeoutException(f"{name}: not satisfied after {timeout:.1f}s{learned_note}. {e.msg or ''}".strip()) from e
+    observe(name, time.perf_counter() - start)
+    return result
+
+
+def drift(history: dict[str, list[float]]) -> list[tuple[str, float, float]]:
+    """(name, previous median, recent median) for the waits getting slower."""
+    slower = []
+    for name, values in sorted(history.items()):
+        if len(values) < 2 * DRIFT_WINDOW:
+            continue
+        before = percentile(values[-2 * DRIFT_WINDOW:-DRIFT_WINDOW], 50)
+        recent = percentile(values[-DRIFT_WINDOW:], 50)
+        if before and recent > before * DRIFT_RATIO:
+            slower.append((name, before, recent))
+    return slower
+
+
+def print_drift(history: dict[str, list[float]] | None = None):
+    history = load_history() if history is None else history
+    slower = drift(history)
+    if slower:
+        print("\nWaits drifting slower (median of the last runs vs the ones before):")
+        for name, before, recent in slower:
+            print(f" - {name}: {before:.2f}s -> {recent:.2f}s ({recent / before:.1f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show learned timeouts and drifting waits.")
+    parser.add_argument("--history", default=HISTORY)
+    args = parser.parse_args(argv)
+    history = load_history(args.history)
+    if not history:
+        print(f"No wait history in {args.history}")
+        return
+    print(f"Learned timeouts (p99 x {SAFETY_FACTOR:g}, after {MIN_SAMPLES} samples):")
+    for name, values in sorted(history.items()):
+        timeout = learned(values, float("inf"))
+        shown = f"{timeout:.2f}s" if timeout != float("inf") else "fixed (not enough samples)"
+        print(f" - {name}: {len(values)} samples, p50 {percentile(values, 50):.2f}s, "
+              f"p99 {percentile(values, 99):.2f}s -> {shown}")
+    print_drift(history)
+
+
+if __name__ == "__main__":
+    main()
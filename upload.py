@@ -1,63 +1,51 @@
 import sys
-import os
 import time
+import os
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import drivers
+from results import ResultWriter, describe, make_record, summarize
+from locators import find, locator, print_stats
+from capture import artifacts_dir, clear_steps, note, on_failure, screenshot
+from download_watch import DownloadWatcher, sha256_of_url
+from perf import print_timings
+from timeouts import observe, timeout_for, until
+from waits import print_report
+
+# DEMOQA_BASE_URL switches the run to the local copies (see fixture_server.py)
+BASE_URL = os.environ.get("DEMOQA_BASE_URL", "https://demoqa.com").rstrip("/")
+URL = f"{BASE_URL}/upload-download"
 
-URL = "https://demoqa.com/upload-download"
+
+def desktop_dir() -> str:
+    # The parallel runner points each test at its own folder
+    return os.environ.get("DEMOQA_ARTIFACTS_DIR") or os.path.join(os.path.expanduser("~"), "Desktop")
 
 
 def downloads_dir() -> str:
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    path = os.path.join(desktop, "DemoQA_Downloads")
+    # Bound to the driver at creation time, so the runner sets it once per worker.
+    # A per-run folder keeps it small and free of older downloads for the watcher.
+    path = os.environ.get("DEMOQA_DOWNLOADS_DIR") or os.path.join(artifacts_dir(), "downloads")
     os.makedirs(path, exist_ok=True)
     return path
 
 
 def make_driver(headless: bool = False):
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--window-size=1280,900")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    prefs = {
-        "download.default_directory": downloads_dir(),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-    }
-    options.add_experimental_option("prefs", prefs)
-    drv = webdriver.Chrome(options=options)
-    drv.implicitly_wait(5)
-    return drv
+    # Shared factory: eager page load, ad hosts blocked (see drivers.py)
+    return drivers.make_driver(headless=headless, download_dir=downloads_dir())
 
 
 def open_page(driver):
-    driver.get(URL)
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "uploadFile")))
+    drivers.open_page(driver, URL, locator("upload.file_input"), name="upload")
 
 
 def save_screenshot(driver, label: str) -> str:
-    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    path = os.path.join(desktop, f"{label}_{ts}.png")
-    try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        driver.save_screenshot(path)
-        print(f"Saved screenshot: {path}")
-    except Exception as e:
-        print(f"Could not save screenshot: {e}")
-    return path
+    # Written in the background into the run's artifacts folder (see capture.py)
+    return screenshot(driver, label)
 
 
 def create_temp_file() -> str:
-    dir_path = os.path.join(os.path.expanduser("~"), "Desktop")
+    dir_path = desktop_dir()
     os.makedirs(dir_path, exist_ok=True)
     filename = f"demoqa_upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     path = os.path.join(dir_path, filename)
@@ -66,36 +54,14 @@ def create_temp_file() -> str:
     return path
 
 
-def list_files(path: str) -> set[str]:
-    try:
-        return set(os.listdir(path))
-    except Exception:
-        return set()
-
-
-def wait_for_new_download(prev: set[str], folder: str, timeout: int = 20) -> str | None:
-    end = time.time() + timeout
-    while time.time() < end:
-        curr = list_files(folder)
-        new = [f for f in curr - prev if not f.endswith('.crdownload')]
-        if new:
-            file_path = os.path.join(folder, new[0])
-            # Ensure file write complete
-            if not file_path.endswith('.crdownload') and os.path.exists(file_path):
-                return file_path
-        time.sleep(0.3)
-    return None
-
-
 def test_upload_shows_filename(driver):
     open_page(driver)
     file_path = create_temp_file()
-    upload = driver.find_element(By.ID, "uploadFile")
+    upload = find(driver, "upload.file_input")
     upload.send_keys(file_path)
-    WebDriverWait(driver, 5).until(EC.visibility_of_element_located((By.ID, "uploadedFilePath")))
-    text = driver.find_element(By.ID, "uploadedFilePath").text
+    text = until(driver, "uploaded_path", EC.visibility_of_element_located(locator("upload.uploaded_path")), 5).text
     input_value = upload.get_attribute("value") or ""
-    save_screenshot(driver, "upload_after_select")
+    note(driver, "upload_after_select")
     filename = os.path.basename(file_path)
     # DemoQA shows a browser-provided fake path (C:\\fakepath\\<filename>)
     assert filename in text, "Uploaded file name should appear in the result text."
@@ -105,47 +71,63 @@ def test_upload_shows_filename(driver):
 
 def test_download_saves_file(driver):
     open_page(driver)
-    folder = downloads_dir()
-    before = list_files(folder)
-    btn = driver.find_element(By.ID, "downloadButton")
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", btn)
-    try:
-        WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.ID, "downloadButton")))
-        btn.click()
-    except Exception:
-        driver.execute_script("arguments[0].click();", btn)
-    path = wait_for_new_download(before, folder, timeout=25)
-    save_screenshot(driver, "download_after_click")
-    assert path is not None and os.path.isfile(path), "A file should be downloaded into the configured folder."
+    # Armed before the click so the completion event cannot be missed
+    btn = find(driver, "upload.download_button")
+    # Deterministic payload (a data: URL live, the fixture's sample file locally): the
+    # download must match it byte for byte, not just be non-empty
+    expected = sha256_of_url(btn.get_attribute("href") or "")
+    with DownloadWatcher(downloads_dir()) as watcher:
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", btn)
+        try:
+            until(driver, "download_button", EC.element_to_be_clickable(btn), 5)
+            btn.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", btn)
+        timeout = timeout_for("download", 25)
+        download = watcher.wait(timeout=timeout, expected_sha256=expected)
+        observe("download", download["elapsed"] if download else timeout, ok=download is not None)
+    note(driver, "download_after_click")
+    assert download is not None, "A file should be downloaded into the configured folder."
+    print(f"Downloaded {os.path.basename(download['path'])}: {download['size']} bytes in "
+          f"{download['elapsed']:.2f}s ({watcher.mode}, sha256 {download['sha256'][:12]})")
+    assert download["size"] > 0, "The downloaded file should not be empty."
+    assert download["ok"], (f"The downloaded file should match the served one "
+                            f"(sha256 {download['sha256'][:12]} != {expected[:12]}).")
 
 
 def main():
-    failures = []
     driver = None
+    # One flushed line per finished test (see results.py), readable while the suite still runs
+    writer = ResultWriter()
     try:
         driver = make_driver(headless=False)
         for fn in (test_upload_shows_filename, test_download_saves_file):
+            clear_steps()
+            writer.start("upload", fn.__name__)
+            start = time.perf_counter()
+            status, msg, artifacts = "PASS", "", []
             try:
                 fn(driver)
-                print(f"PASS: {fn.__name__}")
             except AssertionError as e:
-                print(f"FAIL: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, str(e)))
+                status, msg = "FAIL", str(e)
             except Exception as e:
-                print(f"ERROR: {fn.__name__} -> {e}")
-                failures.append((fn.__name__, f"Unexpected: {e}"))
+                status, msg = "ERROR", f"Unexpected: {e}"
+            elapsed = time.perf_counter() - start
+            if status != "PASS":
+                artifacts.append(on_failure(driver, fn.__name__))
+            # Budget breaches of the test's key actions are printed and recorded with its result
+            record = make_record("upload", fn.__name__, status, elapsed, msg, artifacts)
+            print(describe(record))
+            writer.write(record)
     finally:
+        writer.close()
         if driver is not None:
             driver.quit()
 
-    if failures:
-        print("\nSummary: Some tests failed")
-        for name, msg in failures:
-            print(f" - {name}: {msg}")
-        sys.exit(1)
-    else:
-        print("\nSummary: All tests passed")
-        sys.exit(0)
+    print_report()
+    print_stats()
+    print_timings()
+    sys.exit(summarize(writer.records))
 
 
 if __name__ == "__main__":
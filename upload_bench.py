@@ -0,0 +1,149 @@
+"""Upload throughput benchmark for the ``uploadFile`` input.
+
+Generates files from KB to multi-GB without holding them in memory (sparse by
+default, or streamed in 1 MB blocks with ``--streamed``), pushes each through
+``uploadFile`` and records the time until ``uploadedFilePath`` shows the file
+name and the RSS of the driver's process tree. Results are written as CSV so
+runs can be compared; ``--baseline`` flags rows slower than a previous run.
+
+    python upload_bench.py --sizes 1KB,1MB,100MB,2GB --out bench.csv
+    python upload_bench.py --sizes 1KB,1MB,100MB,2GB --baseline bench.csv
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+import upload
+from capture import artifacts_dir
+from locators import find
+from resources import driver_roots, tree_rss
+
+UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+BLOCK = 1024 * 1024
+FIELDS = ["size", "bytes", "mode", "visible_s", "rss_before_mb", "rss_after_mb"]
+# A row counts as a regression when it is this much slower than the baseline
+REGRESSION_RATIO = 1.5
+
+
+def parse_size(text: str) -> int:
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*", text.upper())
+    if not m:
+        raise ValueError(f"Unrecognised size: {text!r}")
+    return int(float(m.group(1)) * UNITS[m.group(2) or "B"])
+
+
+def make_file(folder: str, size: int, streamed: bool = False) -> str:
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"upload_bench_{size}.bin")
+    with open(path, "wb") as f:
+        if streamed:
+            block = bytes(range(256)) * (BLOCK // 256)
+            remaining = size
+            while remaining > 0:
+                remaining -= f.write(block[:min(remaining, BLOCK)])
+        else:
+            # Sparse: the file system allocates nothing, the browser still reads ``size`` bytes
+            f.truncate(size)
+    return path
+
+
+def time_upload(driver, path: str, timeout: float = 300.0) -> float:
+    upload.open_page(driver)
+    name = os.path.basename(path)
+    field = find(driver, "upload.file_input")
+    start = time.perf_counter()
+    field.send_keys(path)
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+        lambda d: name in d.execute_script(
+            "const el = document.getElementById('uploadedFilePath'); return el ? el.textContent : '';"
+        )
+    )
+    return time.perf_counter() - start
+
+
+def run_bench(driver, sizes: list[str], streamed: bool = False, keep: bool = False) -> list[dict]:
+    folder = artifacts_dir("upload_bench")
+    # chromedriver's tree, plus Chrome itself when attached to a daemon browser
+    roots = driver_roots(driver)
+    rows = []
+    for label in sizes:
+        size = parse_size(label)
+        path = make_file(folder, size, streamed)
+        try:
+            rss_before = sum(tree_rss(root) for root in roots)
+            elapsed = time_upload(driver, path)
+            rss_after = sum(tree_rss(root) for root in roots)
+        finally:
+            if not keep:
+                os.remove(path)
+        row = {
+            "size": label,
+            "bytes": size,
+            "mode": "streamed" if streamed else "sparse",
+            "visible_s": round(elapsed, 4),
+            "rss_before_mb": round(rss_before / UNITS["MB"], 1),
+            "rss_after_mb": round(rss_after / UNITS["MB"], 1),
+        }
+        print(f"{label:>8}: visible after {row['visible_s']:.3f}s, driver RSS {row['rss_after_mb']} MB")
+        rows.append(row)
+    return rows
+
+
+def write_csv(rows: list[dict], out):
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def regressions(rows: list[dict], baseline_path: str) -> list[str]:
+    with open(baseline_path, newline="", encoding="utf-8") as f:
+        before = {(r["bytes"], r["mode"]): float(r["visible_s"]) for r in csv.DictReader(f)}
+    found = []
+    for row in rows:
+        old = before.get((str(row["bytes"]), row["mode"]))
+        if old and row["visible_s"] > old * REGRESSION_RATIO:
+            found.append(f"{row['size']} ({row['mode']}): {old:.3f}s -> {row['visible_s']:.3f}s")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark uploadFile with large files.")
+    parser.add_argument("--sizes", default="1KB,1MB,10MB,100MB,1GB", help="comma separated, e.g. 1KB,1MB,2GB")
+    parser.add_argument("--streamed", action="store_true", help="write real data instead of sparse files")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    parser.add_argument("--out", help="CSV file for the results (default: stdout)")
+    parser.add_argument("--baseline", help="previous CSV to compare against")
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args(argv)
+
+    driver = upload.make_driver(headless=not args.headed)
+    try:
+        rows = run_bench(driver, [s for s in args.sizes.split(",") if s.strip()], args.streamed, args.keep)
+    finally:
+        driver.quit()
+
+    # Compared first: --out may overwrite the baseline file
+    slower = regressions(rows, args.baseline) if args.baseline else []
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            write_csv(rows, f)
+        print(f"Results written to {args.out}")
+    else:
+        write_csv(rows, sys.stdout)
+    if args.baseline:
+        if slower:
+            print("\nSummary: Upload regressions against the baseline")
+            for line in slower:
+                print(f" - {line}")
+            sys.exit(1)
+        print("\nSummary: No regression against the baseline")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
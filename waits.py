@@ -0,0 +1,152 @@
+"""Event-driven settle waits shared by the suites.
+
+``wait_for_quiet`` installs a MutationObserver on the page content and returns
+as soon as no DOM mutation happened for ``quiet_ms`` (one ``execute_async_script``
+round trip), instead of sleeping for a fixed time. Every wait is recorded with
+the fixed sleep it replaces so the saving can be reported.
+
+The absence checks (``settled_text``, ``assert_absent``, ``assert_text_absent``)
+build on it: once the page is quiet, whatever is not there will not appear, so
+they look once instead of waiting out a timeout, with the implicit wait off.
+``no_implicit_wait`` also wraps every ``timeouts.until`` so explicit waits
+never stack on the driver's implicit wait.
+"""
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Content column shared by the demoqa pages (menus and ads live outside of it)
+CONTENT_ROOT = ".col-12.mt-4.col-md-6"
+QUIET_MS = 150
+
+TIMINGS: list[dict] = []
+
+JS_WAIT_QUIET = """
+const [selector, quietMs, timeoutMs, done] = arguments;
+const root = document.querySelector(selector) || document.body;
+let q = window.__quiet;
+if (!q || q.root !== root) {
+    if (q) q.observer.disconnect();
+    q = window.__quiet = {root: root, last: performance.now(), mutations: 0};
+    q.observer = new MutationObserver(list => { q.last = performance.now(); q.mutations += list.length; });
+    q.observer.observe(root, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+const start = performance.now();
+const before = q.mutations;
+(function check() {
+    const now = performance.now();
+    const idle = now - q.last;
+    if (idle >= quietMs || now - start >= timeoutMs) {
+        return done({settled: idle >= quietMs, mutations: q.mutations - before});
+    }
+    setTimeout(check, Math.min(quietMs - idle, 25));
+})();
+"""
+
+
+def wait_for_quiet(driver, label: str, baseline: float = 0.0, root: str = CONTENT_ROOT,
+                   quiet_ms: int = QUIET_MS, timeout: float = 5.0) -> float:
+    """Block until ``root`` has had no DOM mutation for ``quiet_ms``; return the seconds waited.
+
+    ``baseline`` is the fixed sleep this wait replaces, kept for the report.
+    """
+    return _settle(driver, label, baseline, root, quiet_ms, timeout)[0]
+
+
+def _settle(driver, label, baseline=0.0, root=CONTENT_ROOT, quiet_ms=QUIET_MS, timeout=5.0) -> tuple[float, bool]:
+    start = time.perf_counter()
+    res = driver.execute_async_script(JS_WAIT_QUIET, root, quiet_ms, int(timeout * 1000)) or {}
+    waited = time.perf_counter() - start
+    settled = bool(res.get("settled"))
+    record(label, waited, baseline, settled, res.get("mutations", 0))
+    return waited, settled
+
+
+@contextmanager
+def no_implicit_wait(driver):
+    """Lookups inside return at once instead of stalling for the implicit wait."""
+    implicit = getattr(driver, "implicit_wait_s", 0)
+    if implicit:
+        driver.implicitly_wait(0)
+    try:
+        yield driver
+    finally:
+        if implicit:
+            driver.implicitly_wait(implicit)
+
+
+def _settled_elements(driver, locator, label: str, timeout: float) -> list:
+    _, settled = _settle(driver, label, timeout=timeout)
+    if not settled:
+        raise AssertionError(f"{label}: the page was still changing after {timeout:.0f}s")
+    with no_implicit_wait(driver):
+        return driver.find_elements(*locator)
+
+
+def settled_text(driver, locator, label: str = "settled_text", timeout: float = 5.0) -> str:
+    """Visible text of ``locator`` once the page is quiet, ``""`` if it is not there."""
+    elements = _settled_elements(driver, locator, label, timeout)
+    return elements[0].text if elements else ""
+
+
+def assert_absent(driver, locator, message: str, label: str = "assert_absent", timeout: float = 5.0):
+    """Fail if ``locator`` is displayed once the page has settled."""
+    assert not any(el.is_displayed() for el in _settled_elements(driver, locator, label, timeout)), message
+
+
+def assert_text_absent(driver, locator, text: str, message: str, label: str = "assert_text_absent",
+                       timeout: float = 5.0):
+    """Fail if ``text`` shows up in ``locator`` once the page has settled (a missing element passes)."""
+    elements = _settled_elements(driver, locator, label, timeout)
+    assert not (elements and text in elements[0].text), message
+
+
+def record(label: str, waited: float, baseline: float = 0.0, settled: bool = True, mutations: int = 0):
+    """Add one named wait to the report (also used for page loads)."""
+    entry = {
+        "label": label,
+        "waited": round(waited, 4),
+        "baseline": baseline,
+        "settled": settled,
+        "mutations": mutations,
+    }
+    TIMINGS.append(entry)
+    # The parallel runner collects the waits of every worker in one file
+    log_path = os.environ.get("DEMOQA_WAIT_LOG")
+    if log_path:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def load_log(path: str) -> list[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def print_report(records: list[dict] | None = None):
+    records = TIMINGS if records is None else records
+    if not records:
+        return
+    by_label = defaultdict(list)
+    for r in records:
+        by_label[r["label"]].append(r)
+    print("\nWaits and page loads (actual vs fixed sleep):")
+    total_waited = total_baseline = 0.0
+    for label, rows in sorted(by_label.items()):
+        waited = sum(r["waited"] for r in rows)
+        baseline = sum(r["baseline"] for r in rows)
+        unsettled = sum(1 for r in rows if not r["settled"])
+        # Only waits that replaced a fixed sleep count towards the saving
+        if baseline:
+            total_waited += waited
+            total_baseline += baseline
+        extra = f", {unsettled} hit timeout" if unsettled else ""
+        print(f" - {label}: {len(rows)} waits, {waited:.2f}s (fixed: {baseline:.2f}s){extra}")
+    if total_baseline:
+        print(f" Settle waits: {total_waited:.2f}s instead of {total_baseline:.2f}s of fixed sleeps "
+              f"({total_baseline - total_waited:+.2f}s saved)")